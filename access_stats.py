@@ -0,0 +1,256 @@
+"""
+Which cards and decks get requested most, and a cache warmer built on it.
+
+Every built deck records its canonical card names and its deck hash in
+per-process counters. They are merged into cache/access_stats.json at
+most once per FLUSH_INTERVAL and trimmed to the top CARD_CAPACITY cards
+and DECK_CAPACITY decks, so the file stays small whatever the traffic.
+
+    python access_stats.py top
+    python access_stats.py warm [--cards 500] [--decks 20] [--simulate]
+
+warm() preloads the hottest cards into the card and capability caches
+(fetching any that are missing) and, with simulate=True, precomputes the
+stored simulation results for the most-submitted decks, so the first
+requests after a deploy cost what steady-state requests do.
+"""
+
+import os
+import time
+import atexit
+import argparse
+import threading
+from collections import Counter
+
+from cache_io import read_json, update_json
+
+STATS_PATH = "cache/access_stats.json"
+
+CARD_CAPACITY = 2000
+DECK_CAPACITY = 200
+FLUSH_INTERVAL = 60
+
+# Counts are halved once the hottest key passes this, so old favorites
+# fade instead of counts growing forever
+HALVE_AT = 1_000_000
+
+ENABLED = os.environ.get("ACCESS_STATS", "1") != "0"
+WARM_ON_START = os.environ.get("CACHE_WARM_ON_START", "0") == "1"
+WARM_SIMULATE = os.environ.get("CACHE_WARM_SIMULATE", "0") == "1"
+
+
+def _trim(counts, capacity):
+    """
+    Keeps the `capacity` highest counts (halving all if they grew too big).
+    """
+    top = dict(Counter(counts).most_common(capacity))
+    if top and max(top.values()) > HALVE_AT:
+        top = {key: n // 2 for key, n in top.items() if n > 1}
+    return top
+
+
+class AccessStats:
+    """
+    Pending per-process counts plus a locked merge into the shared file.
+    """
+
+    def __init__(self, path=STATS_PATH, clock=time.monotonic):
+        self.path = path
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._cards = Counter()
+        self._decks = Counter()
+        self._decklists = {}
+        self._flushed = clock()
+
+    def record_deck(self, deck_hash, decklist, card_names):
+        with self._lock:
+            self._cards.update(set(card_names))
+            self._decks[deck_hash] += 1
+            self._decklists[deck_hash] = decklist
+
+            # Bound memory between flushes too
+            if len(self._cards) > 4 * CARD_CAPACITY:
+                self._cards = Counter(_trim(self._cards, CARD_CAPACITY))
+            if len(self._decks) > 4 * DECK_CAPACITY:
+                self._decks = Counter(_trim(self._decks, DECK_CAPACITY))
+                self._decklists = {h: self._decklists[h] for h in self._decks}
+
+            due = self.clock() - self._flushed >= FLUSH_INTERVAL
+
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Merges pending counts into the shared file. Stats are a convenience:
+        a failed write is logged and the counts are kept for the next try,
+        never raised into the request that happened to trigger the flush.
+        """
+        with self._lock:
+            cards, self._cards = self._cards, Counter()
+            decks, self._decks = self._decks, Counter()
+            decklists, self._decklists = self._decklists, {}
+            self._flushed = self.clock()
+
+        if not cards and not decks:
+            return
+
+        def merge(on_disk):
+            merged_cards = Counter(on_disk.get("cards", {}))
+            merged_cards.update(cards)
+
+            merged_decks = Counter(on_disk.get("decks", {}))
+            merged_decks.update(decks)
+            top_decks = _trim(merged_decks, DECK_CAPACITY)
+
+            known = {**on_disk.get("decklists", {}), **decklists}
+            return {
+                "cards": _trim(merged_cards, CARD_CAPACITY),
+                "decks": top_decks,
+                "decklists": {h: known[h] for h in top_decks if h in known},
+            }
+
+        try:
+            update_json(self.path, merge)
+        except OSError as e:
+            print(f"⚠️ Access stats not saved: {e}")
+            with self._lock:
+                self._cards.update(cards)
+                self._decks.update(decks)
+                self._decklists = {**decklists, **self._decklists}
+
+    def load(self):
+        return read_json(self.path, {})
+
+    def top_cards(self, n):
+        counts = self.load().get("cards", {})
+        return [name for name, _ in Counter(counts).most_common(n)]
+
+    def top_decks(self, n):
+        """
+        [(deck_hash, decklist)] for the n most-submitted decks.
+        """
+        data = self.load()
+        decklists = data.get("decklists", {})
+        return [
+            (h, decklists[h])
+            for h, _ in Counter(data.get("decks", {})).most_common(n)
+            if h in decklists
+        ]
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_access_stats():
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = AccessStats()
+            atexit.register(_stats.flush)
+    return _stats
+
+
+def record_deck(deck, decklist, deck_hash):
+    """
+    Counts a deck each time pipeline.load_deck builds it. A deck reused
+    through its deck_id handle is not counted again: it is already stored
+    and warm, so its repeat visits say nothing the warmer needs.
+    """
+    if not ENABLED:
+        return
+
+    names = []
+    for name in set(deck.cards):
+        card = deck.card_data.get(name.lower())
+        if card:
+            names.append(card.get("name", name))
+
+    get_access_stats().record_deck(deck_hash, decklist, names)
+
+
+# ==================================================
+# Warmer
+# ==================================================
+
+# What a plain /analyze and /mulligans visit simulate (see Deck.analyze
+# and mulligans.run_mulligan_simulation)
+WARM_SIMULATIONS = (
+    ("hand_quality_stratified", 2000),
+    ("mulligans", 10_000),
+    ("early_game", 10_000),
+)
+
+
+def warm(cards=500, decks=20, simulate=False):
+    """
+    Preloads the hottest cards (and their capabilities) and, if simulate,
+    the simulation results of the hottest decks. Returns what was warmed.
+    """
+    from capability_cache import get_capability_cache
+    from pipeline import build_deck
+    from scryfall import fetch_cards_bulk
+    from sim_store import get_store
+
+    stats = get_access_stats()
+
+    names = stats.top_cards(cards)
+    lookup = fetch_cards_bulk(names) if names else {}
+
+    capability_cache = get_capability_cache()
+    for card in {id(c): c for c in lookup.values()}.values():
+        capability_cache.get_or_extract(card)
+    capability_cache.save()
+
+    simulated = 0
+    if simulate:
+        store = get_store()
+        for _, decklist in stats.top_decks(decks):
+            try:
+                deck = build_deck(decklist)
+            except RuntimeError:
+                continue
+            for kind, iterations in WARM_SIMULATIONS:
+                store.run(deck, kind, iterations)
+            simulated += 1
+
+    return {"cards": len(names), "decks": simulated}
+
+
+def warm_in_background(cards=500, decks=20, simulate=False):
+    def run():
+        try:
+            warmed = warm(cards, decks, simulate)
+            print(f"🔥 Warmed {warmed['cards']} cards and {warmed['decks']} decks")
+        except Exception as e:
+            print(f"⚠️ Cache warming failed: {e}")
+
+    thread = threading.Thread(target=run, name="cache-warmer", daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Access statistics and cache warmer")
+    parser.add_argument("command", choices=["top", "warm"])
+    parser.add_argument("--cards", type=int, default=500)
+    parser.add_argument("--decks", type=int, default=20)
+    parser.add_argument("--simulate", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "top":
+        data = get_access_stats().load()
+        for name, n in Counter(data.get("cards", {})).most_common(args.cards):
+            print(f"{n:>8}  {name}")
+        for h, n in Counter(data.get("decks", {})).most_common(args.decks):
+            print(f"{n:>8}  deck {h[:12]}")
+        return
+
+    warmed = warm(args.cards, args.decks, args.simulate)
+    print(f"Warmed {warmed['cards']} cards and {warmed['decks']} decks")
+
+
+if __name__ == "__main__":
+    main()
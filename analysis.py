@@ -3,6 +3,10 @@ import json
 import random
 from math import comb, ceil
 
+from oracle_parser import PIP_FIELDS, pip_vector
+from hand_table import HandTable, card_code, color_mask, hand_signature
+from stratified import delta_stderr, estimate, sample_strata
+
 COLOR_SYMBOLS = {"W", "U", "B", "R", "G"}
 
 
@@ -36,17 +40,28 @@ def count_draw_engines(deck):
 # ==================================================
 
 def commander_on_curve_probability(deck):
-    if deck.commander_cmc is None:
+    """
+    Chance of having the mana for the (cheapest) commander on its turn.
+    """
+    costs = [c.get("cmc") for c in deck.commanders]
+    costs = [cmc for cmc in costs if isinstance(cmc, (int, float))]
+    if not costs:
         return 0.0
+    cmc = min(costs)
 
-    cmc_required = int(ceil(deck.commander_cmc))
+    cmc_required = int(ceil(cmc))
 
-    total_lands = deck.total_land_count()
+    total_lands = sum(
+        1 for name in deck.cards
+        if "land" in deck.card_capabilities.get(name, {}).get("types", [])
+    )
     ramp = count_ramp(deck)
 
     effective_sources = total_lands + ramp
     draws = 7 + cmc_required - 1
-    deck_size = 99
+    # Commanders start in the command zone, not the library
+    commanders = {c.get("name", "").lower() for c in deck.commanders}
+    deck_size = sum(1 for name in deck.cards if name.lower() not in commanders)
 
     def hypergeom_at_least(k, N, K, n):
         return sum(
@@ -66,15 +81,6 @@ def commander_on_curve_probability(deck):
 # Utilities
 # ==================================================
 
-def _extract_mana_symbols(mana_cost):
-    if not mana_cost:
-        return []
-    return [
-        p for p in mana_cost.replace("}", "").split("{")
-        if p in COLOR_SYMBOLS
-    ]
-
-
 def _build_flat_deck(deck):
     """
     Deck.cards is already a flat list of card names.
@@ -88,6 +94,7 @@ def _build_flat_deck(deck):
 
 def color_saturation(deck):
     counts = {c: 0 for c in COLOR_SYMBOLS}
+    colors = [(i, c) for i, c in enumerate(PIP_FIELDS) if c in COLOR_SYMBOLS]
 
     for name in deck.cards:
         card = deck.card_data.get(name.lower())
@@ -97,8 +104,9 @@ def color_saturation(deck):
         if "land" in card.get("type_line", "").lower():
             continue
 
-        for s in _extract_mana_symbols(card.get("mana_cost", "")):
-            counts[s] += 1
+        pips = pip_vector(card.get("mana_cost", ""))
+        for i, c in colors:
+            counts[c] += pips[i]
 
     total = sum(counts.values())
     return {
@@ -218,27 +226,57 @@ def _hand_stats(hand, deck):
 
 def _is_keepable(hand, deck):
     lands, colors, has_ramp = _hand_stats(hand, deck)
+    return _keep_decision(lands, has_ramp, color_mask(colors), color_mask(deck.commander_colors))
+
 
+def _keep_decision(lands, has_ramp, colors, required):
     if lands == 0 or lands >= 6:
         return False
     if lands == 1 and not has_ramp:
         return False
-    if not deck.commander_colors.issubset(colors):
+    if required & ~colors:
         return False
 
     return True
 
 
-def simulate_mulligans(deck, iterations=10_000):
-    flat = _build_flat_deck(deck)
+def keep_table(deck):
+    """
+    _is_keepable as a signature table (see hand_table.py): each card is
+    reduced to (land, repeatable nonland ramp, commander colors it makes).
+    """
+    required = color_mask(deck.commander_colors)
+    codes = {}
+
+    for name in set(deck.cards):
+        _, colors, has_ramp = _hand_stats([name], deck)
+        is_land = "land" in deck.card_capabilities.get(name, {}).get("types", [])
+        codes[name] = card_code(is_land, has_ramp, color_mask(colors))
+
+    return HandTable(
+        codes,
+        lambda lands, has_ramp, colors: _keep_decision(lands, has_ramp, colors, required)
+    )
+
+
+def mulligan_counts(deck, iterations=10_000, rng=None):
+    """
+    Raw mulligan tallies. Counts from separate runs can be summed.
+    """
+    rng = rng or random.Random()
+    table = keep_table(deck)
+
+    # Only the 7 drawn cards matter, so draw them instead of shuffling
+    flat = table.hand_codes(_build_flat_deck(deck))
+    outcome = table.outcome
+    sample = rng.sample
 
     keep_7 = mull_1 = mull_2 = mull_3p = total = 0
 
     for _ in range(iterations):
         mulls = 0
         while mulls <= 3:
-            random.shuffle(flat)
-            if _is_keepable(flat[:7], deck):
+            if outcome(hand_signature(sample(flat, 7))):
                 break
             mulls += 1
 
@@ -253,33 +291,120 @@ def simulate_mulligans(deck, iterations=10_000):
             mull_3p += 1
 
     return {
-        "keep_7_pct": keep_7 / iterations * 100,
-        "mull_1_pct": mull_1 / iterations * 100,
-        "mull_2_pct": mull_2 / iterations * 100,
-        "mull_3_plus_pct": mull_3p / iterations * 100,
-        "avg_mulls": total / iterations
+        "iterations": iterations,
+        "keep_7": keep_7,
+        "mull_1": mull_1,
+        "mull_2": mull_2,
+        "mull_3_plus": mull_3p,
+        "total_mulls": total,
     }
 
 
+def summarize_mulligans(counts):
+    iterations = counts["iterations"]
+    return {
+        "keep_7_pct": counts["keep_7"] / iterations * 100,
+        "mull_1_pct": counts["mull_1"] / iterations * 100,
+        "mull_2_pct": counts["mull_2"] / iterations * 100,
+        "mull_3_plus_pct": counts["mull_3_plus"] / iterations * 100,
+        "avg_mulls": counts["total_mulls"] / iterations
+    }
+
+
+def simulate_mulligans(deck, iterations=10_000, rng=None):
+    return summarize_mulligans(mulligan_counts(deck, iterations, rng))
+
+
+# ==================================================
+# Stratified mulligan simulation
+# ==================================================
+
+KEEP_LABELS = ("keep", "mull")
+
+
+def _split_lands(deck):
+    lands, spells = [], []
+    for name in _build_flat_deck(deck):
+        if "land" in deck.card_capabilities.get(name, {}).get("types", []):
+            lands.append(name)
+        else:
+            spells.append(name)
+    return lands, spells
+
+
+def _mulligan_outcomes(p_keep):
+    """
+    The mulligan tallies above as exact functions of the 7-card keep
+    probability: every attempt is a fresh shuffle, four attempts at most.
+    """
+    q = 1 - p_keep
+    return {
+        "keep_7_pct": p_keep * 100,
+        "mull_1_pct": q * p_keep * 100,
+        "mull_2_pct": q ** 2 * p_keep * 100,
+        "mull_3_plus_pct": q ** 3 * 100,
+        "avg_mulls": p_keep * (q + 2 * q ** 2 + 3 * q ** 3) + 4 * q ** 4,
+    }
+
+
+def stratified_mulligan_counts(deck, iterations=10_000, rng=None, antithetic=False):
+    """
+    Keep-rate tallies stratified by land count (see stratified.py).
+    Hands with 0 or 6+ lands are never keepable, so they are not sampled.
+    """
+    rng = rng or random.Random()
+    lands, spells = _split_lands(deck)
+    keepable = keep_table(deck).evaluate
+
+    strata = sample_strata(
+        lands, spells, 7,
+        evaluate=lambda hand: "keep" if keepable(hand) else "mull",
+        labels=KEEP_LABELS,
+        iterations=iterations,
+        rng=rng,
+        fixed=lambda land_count: "mull" if land_count == 0 or land_count >= 6 else None,
+        antithetic=antithetic
+    )
+    return {"iterations": iterations, "strata": strata}
+
+
+def summarize_stratified_mulligans(counts):
+    p, cov = estimate(counts["strata"], KEEP_LABELS)
+
+    params = {"keep": p["keep"]}
+    cov = {("keep", "keep"): cov[("keep", "keep")]}
+    fn = lambda params: _mulligan_outcomes(params["keep"])
+
+    results = fn(params)
+    results["stderr"] = delta_stderr(fn, params, cov)
+    return results
+
+
 # ==================================================
 # Early game consistency
 # ==================================================
 
-def simulate_early_game(deck, iterations=10_000):
+def early_game_counts(deck, iterations=10_000, rng=None):
+    """
+    Raw early game tallies. Counts from separate runs can be summed.
+    """
+    rng = rng or random.Random()
     flat = _build_flat_deck(deck)
+    keepable = keep_table(deck).evaluate
 
     t1_land = t2_land = t3_land = 0
     t1_play = t2_play = t3_play = 0
     color_fail_t2 = color_fail_t3 = 0
 
     for _ in range(iterations):
+        # Opening hand + the three draws below
         while True:
-            random.shuffle(flat)
-            hand = flat[:7]
-            if _is_keepable(hand, deck):
+            drawn = rng.sample(flat, min(10, len(flat)))
+            hand = drawn[:7]
+            if keepable(hand):
                 break
 
-        library = flat[7:]
+        library = drawn[7:]
         lands = 0
         colors = set()
 
@@ -336,12 +461,31 @@ def simulate_early_game(deck, iterations=10_000):
                 color_fail_t3 += 1
 
     return {
-        "t1_land_pct": t1_land / iterations * 100,
-        "t2_land_pct": t2_land / iterations * 100,
-        "t3_land_pct": t3_land / iterations * 100,
-        "t1_play_pct": t1_play / iterations * 100,
-        "t2_play_pct": t2_play / iterations * 100,
-        "t3_play_pct": t3_play / iterations * 100,
-        "color_screw_t2_pct": color_fail_t2 / iterations * 100,
-        "color_screw_t3_pct": color_fail_t3 / iterations * 100
+        "iterations": iterations,
+        "t1_land": t1_land,
+        "t2_land": t2_land,
+        "t3_land": t3_land,
+        "t1_play": t1_play,
+        "t2_play": t2_play,
+        "t3_play": t3_play,
+        "color_screw_t2": color_fail_t2,
+        "color_screw_t3": color_fail_t3,
     }
+
+
+def summarize_early_game(counts):
+    iterations = counts["iterations"]
+    return {
+        "t1_land_pct": counts["t1_land"] / iterations * 100,
+        "t2_land_pct": counts["t2_land"] / iterations * 100,
+        "t3_land_pct": counts["t3_land"] / iterations * 100,
+        "t1_play_pct": counts["t1_play"] / iterations * 100,
+        "t2_play_pct": counts["t2_play"] / iterations * 100,
+        "t3_play_pct": counts["t3_play"] / iterations * 100,
+        "color_screw_t2_pct": counts["color_screw_t2"] / iterations * 100,
+        "color_screw_t3_pct": counts["color_screw_t3"] / iterations * 100
+    }
+
+
+def simulate_early_game(deck, iterations=10_000, rng=None):
+    return summarize_early_game(early_game_counts(deck, iterations, rng))
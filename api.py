@@ -0,0 +1,362 @@
+"""
+JSON API for dashboards and other polling clients.
+
+    POST /api/v1/analyze    {"decklist": "..."}
+    POST /api/v1/profile    {"decklist": "..."}
+    POST /api/v1/mulligans  {"decklist": "...", "iterations": 10000, "seed": 0,
+                             "sampling": "monte_carlo" | "stratified" | "antithetic"}
+    GET  /api/v1/cards?has=draw:engine&identity=GU&cmc_max=3&limit=50
+    GET  /api/v1/commanders?strategy=landfall&strategy=aristocrats&colors=BG
+    POST /api/v1/cube       {"pool": "...", "decks": 2000, "seed": 0}
+    POST /api/v1/similar    {"decklist": "...", "k": 10}
+
+Every response carries a strong ETag derived from the canonical deck hash
+(plus the parameters, code versions and card data generation that affect
+the result), so a client that sends it back in If-None-Match gets a 304
+before the deck is fetched or simulated. A response built while card
+fetches were failing is incomplete: it gets no ETag and is sent
+no-store. Bodies over GZIP_MIN_BYTES are gzipped when the client accepts
+it. The X-Deck-Id response header is a deck handle that can be posted
+back as "deck_id" to skip rebuilding the deck.
+"""
+
+import gzip
+import json
+import hashlib
+from dataclasses import asdict
+
+from flask import Blueprint, Response, abort, request
+
+from capabilities import CAPABILITY_VERSION
+from card_index import get_card_index
+from commander_index import find_commanders
+from cube import MAX_API_DECKS as MAX_CUBE_DECKS, Cube
+from deck_parser import parse_deck
+from deck_profile import DeckProfile
+from deck_similarity import similar_decks
+from mulligans import MAX_ITERATIONS, SAMPLING_MODES, run_mulligan_simulation
+from pipeline import build_pool, load_deck
+from profiling import profiled
+from scryfall import card_data_generation
+from sim_store import SIMULATOR_VERSION, cards_hash, is_complete
+
+# orjson is optional: several times faster, same output
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+API_VERSION = 1
+GZIP_MIN_BYTES = 1024
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+
+# ==================================================
+# Encoding
+# ==================================================
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _accepts_gzip():
+    return "gzip" in request.headers.get("Accept-Encoding", "")
+
+
+def encode(payload, accepts_gzip, etag=None):
+    """
+    payload -> (body, content_encoding, etag), shared with asgi.py.
+    """
+    body = dumps(payload)
+    if len(body) >= GZIP_MIN_BYTES and accepts_gzip:
+        # Strong validators must differ between encodings
+        return gzip.compress(body, compresslevel=6), "gzip", f"{etag}-gzip" if etag else None
+    return body, None, etag
+
+
+def _json_response(payload, status=200, etag=None, headers=None):
+    body, encoding, etag = encode(payload, _accepts_gzip(), etag)
+    response = Response(body, status=status, mimetype="application/json")
+
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Vary"] = "Accept-Encoding"
+    if etag:
+        response.set_etag(etag)
+    for key, value in (headers or {}).items():
+        response.headers[key] = value
+    return response
+
+
+def _error(status, message):
+    return _json_response({"error": message}, status=status)
+
+
+# ==================================================
+# Request helpers
+# ==================================================
+
+def _params():
+    if request.is_json:
+        params = request.get_json(silent=True) or {}
+        if not isinstance(params, dict):
+            abort(_error(400, "JSON body must be an object"))
+        return params
+    return request.form
+
+
+def decklist_param(params):
+    decklist = params.get("decklist") or ""
+    # parse_deck treats single-line input as a file path; never do that here
+    if "\n" not in decklist:
+        decklist += "\n"
+    return decklist
+
+
+def deck_etag(kind, decklist, *extra):
+    """
+    Computed from the parsed list and the card data generation, so it is
+    known before any card fetching or simulation happens.
+    """
+    flat_cards, _, commander_name = parse_deck(decklist)
+    if not commander_name:
+        return None
+
+    key = ":".join(str(part) for part in (
+        f"v{API_VERSION}", kind,
+        cards_hash(commander_name, flat_cards),
+        f"c{CAPABILITY_VERSION}", f"s{SIMULATOR_VERSION}",
+        f"g{card_data_generation()}",
+        *extra,
+    ))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def _not_modified(etag):
+    if not etag:
+        return None
+    if not (request.if_none_match.contains(etag)
+            or request.if_none_match.contains(f"{etag}-gzip")):
+        return None
+
+    response = Response(status=304)
+    response.headers["Vary"] = "Accept-Encoding"
+    response.set_etag(f"{etag}-gzip" if _accepts_gzip() else etag)
+    return response
+
+
+def _handle(kind, compute, *extra):
+    """
+    Shared flow for every endpoint: ETag check first, then build (or
+    reuse) the deck and run `compute(deck)`.
+    """
+    params = _params()
+    decklist = decklist_param(params)
+
+    etag = deck_etag(kind, decklist, *extra)
+    if etag is None:
+        return _error(400, "No cards found in decklist")
+
+    cached = _not_modified(etag)
+    if cached is not None:
+        return cached
+
+    try:
+        deck, deck_id = load_deck(decklist, params.get("deck_id") or "")
+    except RuntimeError as e:
+        return _error(422, str(e))
+
+    headers = {"X-Deck-Id": deck_id} if deck_id else {}
+    if not is_complete(deck):
+        # Degraded by a failed fetch: must not be revalidated as current
+        etag = None
+        headers["Cache-Control"] = "no-store"
+
+    return _json_response(compute(deck), etag=etag, headers=headers)
+
+
+def _unresolved(deck):
+    return [asdict(u) for u in getattr(deck, "unresolved", [])]
+
+
+# ==================================================
+# Payloads
+# ==================================================
+# Module-level so asgi.py can run them in a process pool
+
+def analyze_payload(deck):
+    return {
+        "analysis": deck.analyze(),
+        "unresolved": _unresolved(deck),
+    }
+
+
+def profile_payload(deck):
+    return {
+        "profile": DeckProfile(deck, deck.analyze()).build(),
+        "unresolved": _unresolved(deck),
+    }
+
+
+def mulligans_payload(deck, iterations, seed, sampling):
+    return run_mulligan_simulation(deck, iterations=iterations, seed=seed, sampling=sampling)
+
+
+def mulligan_params(params):
+    """
+    (iterations, seed, sampling) from request params.
+    Raises ValueError with a client-facing message.
+    """
+    try:
+        iterations = min(int(params.get("iterations", 10_000)), MAX_ITERATIONS)
+        seed = int(params.get("seed", 0))
+    except (TypeError, ValueError):
+        raise ValueError("iterations and seed must be integers")
+    if iterations < 1:
+        raise ValueError("iterations must be at least 1")
+
+    sampling = params.get("sampling", "monte_carlo")
+    if sampling not in SAMPLING_MODES:
+        raise ValueError(f"sampling must be one of {', '.join(SAMPLING_MODES)}")
+
+    return iterations, seed, sampling
+
+
+# ==================================================
+# Endpoints
+# ==================================================
+
+@api.route("/analyze", methods=["POST"])
+@profiled("api.analyze")
+def analyze():
+    return _handle("analyze", analyze_payload)
+
+
+@api.route("/profile", methods=["POST"])
+def profile():
+    return _handle("profile", profile_payload)
+
+
+@api.route("/cards", methods=["GET"])
+def cards():
+    """
+    Card search over the local corpus (see card_index.py). Repeat `has`,
+    `any` and `not` for several keys.
+    """
+    args = request.args
+    try:
+        cmc_min = int(args["cmc_min"]) if "cmc_min" in args else None
+        cmc_max = int(args["cmc_max"]) if "cmc_max" in args else None
+        limit = min(int(args.get("limit", 100)), 1000)
+    except ValueError:
+        return _error(400, "cmc_min, cmc_max and limit must be integers")
+    if limit < 0:
+        return _error(400, "limit must not be negative")
+
+    index = get_card_index()
+    bits = index.search(
+        all_of=args.getlist("has"),
+        any_of=args.getlist("any"),
+        none_of=args.getlist("not"),
+        identity=args.get("identity"),
+        cmc_min=cmc_min,
+        cmc_max=cmc_max,
+    )
+
+    return _json_response({
+        "total": index.count(bits),
+        "cards": index.names_of(bits, limit=limit),
+    })
+
+
+@api.route("/commanders", methods=["GET"])
+def commanders():
+    """
+    Commanders by strategy and color identity from the prebuilt index
+    (python commander_index.py build). `exact=1` matches the colors
+    exactly instead of "within"; `secondary=1` also matches secondary
+    strategies.
+    """
+    args = request.args
+    try:
+        limit = min(int(args.get("limit", 20)), 200)
+    except ValueError:
+        return _error(400, "limit must be an integer")
+    if limit < 0:
+        return _error(400, "limit must not be negative")
+
+    return _json_response({
+        "commanders": find_commanders(
+            strategies=args.getlist("strategy"),
+            colors=args.get("colors"),
+            exact=args.get("exact") == "1",
+            primary_only=args.get("secondary") != "1",
+            limit=limit,
+        )
+    })
+
+
+@api.route("/cube", methods=["POST"])
+def cube():
+    """
+    Color balance and mana consistency of 40-card decks sampled from a
+    cube list (see cube.py).
+    """
+    params = _params()
+    try:
+        decks = min(int(params.get("decks", 2000)), MAX_CUBE_DECKS)
+        seed = int(params.get("seed", 0))
+    except (TypeError, ValueError):
+        return _error(400, "decks and seed must be integers")
+    if decks < 1:
+        return _error(400, "decks must be at least 1")
+
+    pool = params.get("pool") or ""
+    # parse_pool treats single-line input as a file path; never do that here
+    if "\n" not in pool:
+        pool += "\n"
+
+    pool_deck = build_pool(pool)
+    if not pool_deck.cards:
+        return _error(400, "No cards found in pool")
+
+    result = Cube.from_deck(pool_deck).sample(decks=decks, seed=seed)
+    # The whole pool profiled like a deck (no commander: see Deck)
+    result["pool_profile"] = DeckProfile(pool_deck, pool_deck.analyze()).build()
+    result["unresolved"] = [asdict(u) for u in pool_deck.unresolved]
+    return _json_response(result)
+
+
+@api.route("/similar", methods=["POST"])
+def similar():
+    """
+    Stored decks most similar to the posted one (see deck_similarity.py),
+    with Jaccard similarity and the card diff against each.
+    """
+    params = _params()
+    try:
+        k = min(int(params.get("k", 10)), 100)
+    except (TypeError, ValueError):
+        return _error(400, "k must be an integer")
+    if k < 1:
+        return _error(400, "k must be at least 1")
+
+    return _json_response({"similar": similar_decks(decklist_param(params), k=k)})
+
+
+@api.route("/mulligans", methods=["POST"])
+@profiled("api.mulligans")
+def mulligans():
+    try:
+        iterations, seed, sampling = mulligan_params(_params())
+    except ValueError as e:
+        return _error(400, str(e))
+
+    return _handle(
+        "mulligans",
+        lambda deck: mulligans_payload(deck, iterations, seed, sampling),
+        iterations, seed, sampling
+    )
@@ -0,0 +1,267 @@
+"""
+Async serving mode for the JSON API.
+
+    uvicorn asgi:app
+
+Same endpoints, ETags, gzip and X-Deck-Id handles as api.py, but card
+fetches are awaited on one shared HTTP client (httpx, if installed) and
+the CPU-heavy analysis and simulations run in a process pool, so one
+process keeps hundreds of requests in flight without I/O waits starving
+the simulations or the other way round.
+
+Each route has its own concurrency limit (ROUTE_LIMITS); requests over
+it wait up to QUEUE_TIMEOUT for a slot and then get a 503. Everything
+that isn't one of these routes is handed to the Flask app when asgiref
+is installed.
+"""
+
+import os
+import json
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qsl
+
+from api import (
+    analyze_payload,
+    decklist_param,
+    deck_etag,
+    encode,
+    mulligan_params,
+    mulligans_payload,
+    profile_payload,
+)
+from card_store import open_shared
+from pipeline import load_deck_async
+from scryfall import httpx
+from sim_store import is_complete
+
+# Optional: serve the HTML pages (and the GET API routes) from the same process
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError:
+    WsgiToAsgi = None
+
+SIM_WORKERS = int(os.environ.get("ASGI_SIM_WORKERS", 0)) or os.cpu_count()
+
+# Requests per route allowed to run at once (fetching or simulating)
+ROUTE_LIMITS = {
+    "analyze": 64,
+    "profile": 64,
+    "mulligans": 16,
+}
+QUEUE_TIMEOUT = 30
+
+MAX_BODY_BYTES = 1024 * 1024
+
+# Parent maps the shared tables before the pool forks its workers
+open_shared()
+
+
+# ==================================================
+# Routes
+# ==================================================
+
+def _analyze(params):
+    return (), analyze_payload, ()
+
+
+def _profile(params):
+    return (), profile_payload, ()
+
+
+def _mulligans(params):
+    iterations, seed, sampling = mulligan_params(params)
+    extra = (iterations, seed, sampling)
+    return extra, mulligans_payload, extra
+
+
+# path -> (kind, parse(params) -> (etag extras, payload fn, payload args))
+ROUTES = {
+    "/api/v1/analyze": ("analyze", _analyze),
+    "/api/v1/profile": ("profile", _profile),
+    "/api/v1/mulligans": ("mulligans", _mulligans),
+}
+
+
+class AsyncApp:
+    def __init__(self, fallback=None):
+        self.fallback = fallback
+        self.client = None
+        self.pool = None
+        self.limits = {}
+
+    # ======================
+    # Lifecycle
+    # ======================
+
+    async def startup(self):
+        if httpx is not None:
+            self.client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=10),
+                headers={"Accept": "application/json"},
+            )
+        self.pool = ProcessPoolExecutor(max_workers=SIM_WORKERS)
+        # Created here so they belong to the server's event loop
+        self.limits = {kind: asyncio.Semaphore(n) for kind, n in ROUTE_LIMITS.items()}
+
+    async def shutdown(self):
+        if self.client is not None:
+            await self.client.aclose()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await self.startup()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # ======================
+    # HTTP
+    # ======================
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+
+        route = ROUTES.get(scope.get("path", "")) if scope["type"] == "http" else None
+        if route is None:
+            if self.fallback is not None:
+                return await self.fallback(scope, receive, send)
+            return await _send_json(send, 404, {"error": "Not found"})
+
+        if scope["method"] != "POST":
+            return await _send_json(send, 405, {"error": "Method not allowed"})
+
+        if self.pool is None:
+            # Server without lifespan support
+            await self.startup()
+
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        body = await _read_body(receive)
+        if body is None:
+            return await _send_json(send, 413, {"error": "Request body too large"})
+
+        kind, parse = route
+        status, payload, etag, extra_headers = await self.handle(kind, parse, headers, body)
+
+        if status == 304:
+            return await _send(send, 304, b"", _validators(etag, headers))
+
+        accepts_gzip = "gzip" in headers.get("accept-encoding", "")
+        data, encoding, etag = encode(payload, accepts_gzip, etag)
+        response_headers = [
+            (b"content-type", b"application/json"),
+            (b"vary", b"Accept-Encoding"),
+            *extra_headers,
+        ]
+        if encoding:
+            response_headers.append((b"content-encoding", encoding.encode()))
+        if etag:
+            response_headers.append((b"etag", f'"{etag}"'.encode()))
+        await _send(send, status, data, response_headers)
+
+    async def handle(self, kind, parse, headers, body):
+        """
+        Returns (status, payload, etag, extra headers).
+        """
+        try:
+            params = _parse_params(headers, body)
+            extra, payload_fn, args = parse(params)
+        except ValueError as e:
+            return 400, {"error": str(e)}, None, []
+
+        decklist = decklist_param(params)
+        etag = deck_etag(kind, decklist, *extra)
+        if etag is None:
+            return 400, {"error": "No cards found in decklist"}, None, []
+
+        if _etag_matches(etag, headers.get("if-none-match", "")):
+            return 304, None, etag, []
+
+        try:
+            await asyncio.wait_for(self.limits[kind].acquire(), QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return 503, {"error": "Server busy, try again"}, None, [(b"retry-after", b"5")]
+
+        try:
+            deck, deck_id = await load_deck_async(decklist, params.get("deck_id") or "", self.client)
+            loop = asyncio.get_running_loop()
+            payload = await loop.run_in_executor(self.pool, payload_fn, deck, *args)
+        except RuntimeError as e:
+            return 422, {"error": str(e)}, None, []
+        finally:
+            self.limits[kind].release()
+
+        headers = [(b"x-deck-id", deck_id.encode())] if deck_id else []
+        if not is_complete(deck):
+            # Same as api._handle: a degraded result is never cached
+            etag = None
+            headers.append((b"cache-control", b"no-store"))
+
+        return 200, payload, etag, headers
+
+
+# ==================================================
+# Helpers
+# ==================================================
+
+async def _read_body(receive):
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+def _parse_params(headers, body):
+    if headers.get("content-type", "").startswith("application/json"):
+        try:
+            params = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            raise ValueError("Invalid JSON body")
+        if not isinstance(params, dict):
+            raise ValueError("JSON body must be an object")
+        return params
+    return dict(parse_qsl(body.decode("utf-8", "replace")))
+
+
+def _etag_matches(etag, if_none_match):
+    tags = {t.strip().removeprefix("W/").strip('"') for t in if_none_match.split(",")}
+    return "*" in tags or etag in tags or f"{etag}-gzip" in tags
+
+
+def _validators(etag, headers):
+    if "gzip" in headers.get("accept-encoding", ""):
+        etag = f"{etag}-gzip"
+    return [(b"vary", b"Accept-Encoding"), (b"etag", f'"{etag}"'.encode())]
+
+
+async def _send(send, status, body, headers):
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_json(send, status, payload):
+    await _send(send, status, json.dumps(payload).encode(), [(b"content-type", b"application/json")])
+
+
+def _flask_fallback():
+    if WsgiToAsgi is None:
+        return None
+    from web import app as flask_app
+    return WsgiToAsgi(flask_app)
+
+
+app = AsyncApp(fallback=_flask_fallback())
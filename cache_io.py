@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: locking degrades to in-process only
+    fcntl = None
+
+# Temp files older than this are leftovers from a crashed writer
+STALE_TEMP_AGE = 60 * 60
+
+
+def atomic_write(path, data):
+    """
+    Writes bytes or text so readers only ever see the old or the new file:
+    the data goes to a temp file in the same directory, is fsynced, then
+    renamed over the target.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Exclusive cross-process lock for read-merge-write cycles on `path`
+    (held on a sidecar `.lock` file so the data file can be replaced).
+    """
+    lock_path = f"{path}.lock"
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+
+    with open(lock_path, "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@contextmanager
+def try_file_lock(path):
+    """
+    Non-blocking variant of file_lock: yields True if this process got
+    the lock, False if another one holds it.
+    """
+    lock_path = f"{path}.lock"
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+
+    with open(lock_path, "a") as lock_file:
+        if fcntl:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+        try:
+            yield True
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class FileWatch:
+    """
+    Cheap "was this file replaced?" check for long-lived readers, done at
+    most once per `interval` seconds.
+    """
+
+    def __init__(self, path, interval=30):
+        self.path = path
+        self.interval = interval
+        self._checked = time.monotonic()
+        self._stamp = self._read()
+
+    def _read(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def changed(self):
+        now = time.monotonic()
+        if now - self._checked < self.interval:
+            return False
+        self._checked = now
+
+        stamp = self._read()
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        return True
+
+
+def quarantine(path):
+    """
+    Moves an unreadable cache file aside so the next start is clean.
+    """
+    try:
+        os.replace(path, f"{path}.corrupt-{int(time.time())}")
+    except OSError:
+        pass
+
+
+def read_json(path, default):
+    """
+    Reads a JSON cache file; a missing file returns `default`, a corrupt
+    one is quarantined and also returns `default`.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        quarantine(path)
+        return default
+
+
+def update_json(path, merge, default=None):
+    """
+    Locked read-merge-write: merge(current_on_disk) returns the new value,
+    which is written atomically. Concurrent writers in other processes
+    serialize on the lock, so no update is lost.
+    """
+    with file_lock(path):
+        current = read_json(path, {} if default is None else default)
+        merged = merge(current)
+        atomic_write(path, json.dumps(merged))
+        return merged
+
+
+def remove_stale_temp_files(directory, max_age=STALE_TEMP_AGE):
+    """
+    Crash recovery: deletes temp files a killed writer left behind.
+    """
+    if not os.path.isdir(directory):
+        return
+
+    cutoff = time.time() - max_age
+    for filename in os.listdir(directory):
+        if not filename.startswith(".tmp-"):
+            continue
+        path = os.path.join(directory, filename)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
@@ -1,8 +1,36 @@
+import os
 import re
 import requests
 
-SCRYFALL_URL = "https://api.scryfall.com/cards/named"
+SCRYFALL_API = os.environ.get("SCRYFALL_API", "https://api.scryfall.com")
+SCRYFALL_URL = f"{SCRYFALL_API}/cards/named"
 
+# Bump when extract_capabilities output changes; cached entries from an
+# older version are re-extracted.
+# v2: structured mana entries (produces, source, enters_tapped, repeatable)
+# v3: mana entries settled on produced_mana + type line, regex fallback
+#     (no keyword path, see _mana_abilities)
+CAPABILITY_VERSION = 3
+
+ALL_COLORS = ["W", "U", "B", "R", "G"]
+
+# Basic land types grant their mana ability even without rules text
+BASIC_LAND_TYPES = {
+    "plains": "W",
+    "island": "U",
+    "swamp": "B",
+    "mountain": "R",
+    "forest": "G",
+}
+
+ADD_CLAUSE_RE = re.compile(r"add\s+([^\n\.]+)")
+MANA_SYMBOL_RE = re.compile(r"\{([wubrgc])\}")
+ANY_COLOR_RE = re.compile(r"any (one )?colou?r|any type")
+
+# "enters tapped." but not "enters tapped unless ..." (check/fast lands)
+# and not shock lands ("If you don't, it enters tapped.")
+ENTERS_TAPPED_RE = re.compile(r"enters (the battlefield )?tapped\.")
+TAPPED_OPTIONAL_RE = re.compile(r"if you don't|unless")
 
 def fetch_card_data(name):
     resp = requests.get(SCRYFALL_URL, params={"exact": name})
@@ -28,25 +56,7 @@ def extract_capabilities(card):
     oracle = card.get("oracle_text", "").lower()
 
     # ---------- MANA PRODUCTION ----------
-    add_clauses = re.findall(r"add\s+([^\n\.]+)", oracle)
-
-    for clause in add_clauses:
-        produces = set()
-
-        if "any color" in clause:
-            produces.update(["W", "U", "B", "R", "G"])
-        else:
-            if "w" in clause: produces.add("W")
-            if "u" in clause: produces.add("U")
-            if "b" in clause: produces.add("B")
-            if "r" in clause: produces.add("R")
-            if "g" in clause: produces.add("G")
-            if "c" in clause: produces.add("C")
-
-        if produces:
-            caps["mana"].append({
-                "produces": list(produces)
-            })
+    caps["mana"] = _mana_abilities(card, caps["types"], oracle)
 
     # ---------- DRAW DETECTION ----------
     if re.search(r"draw (a|one|\d+) card", oracle):
@@ -82,3 +92,66 @@ def extract_capabilities(card):
         })
 
     return caps
+
+
+# ==================================================
+# Mana production
+# ==================================================
+
+def _mana_source(types):
+    if "land" in types:
+        return "land"
+    for kind in ("creature", "artifact", "enchantment", "planeswalker"):
+        if kind in types:
+            return kind
+    return "spell"
+
+
+def _regex_produces(oracle):
+    """
+    Fallback for cards without produced_mana: the mana symbols named in
+    each "add ..." clause (or every color for "any color").
+    """
+    produces = set()
+    for clause in ADD_CLAUSE_RE.findall(oracle):
+        if ANY_COLOR_RE.search(clause):
+            produces.update(ALL_COLORS)
+        produces.update(s.upper() for s in MANA_SYMBOL_RE.findall(clause))
+    return produces
+
+
+def _mana_abilities(card, types, oracle):
+    """
+    [{"produces", "source", "enters_tapped", "repeatable"}] for a card.
+
+    Scryfall's produced_mana and the type line are the fast path; the
+    oracle text is only scanned when neither says anything. Keywords are
+    not read: Scryfall's keywords name abilities (Flying, Convoke,
+    Landfall), never the mana a card makes, and produced_mana already
+    covers every mana ability.
+    """
+    produces = set(card.get("produced_mana") or ())
+    if not produces:
+        produces = {c for t, c in BASIC_LAND_TYPES.items() if t in types}
+    if not produces and "add" in oracle:
+        produces = _regex_produces(oracle)
+    if not produces:
+        return []
+
+    source = _mana_source(types)
+
+    # Instants/sorceries (rituals) and "sacrifice ...: add" make mana once
+    repeatable = source != "spell" and not re.search(r"sacrifice [^:]*:[^\n]*add", oracle)
+
+    enters_tapped = bool(
+        source != "spell"
+        and ENTERS_TAPPED_RE.search(oracle)
+        and not TAPPED_OPTIONAL_RE.search(oracle)
+    )
+
+    return [{
+        "produces": [c for c in ALL_COLORS + ["C"] if c in produces],
+        "source": source,
+        "enters_tapped": enters_tapped,
+        "repeatable": repeatable,
+    }]
@@ -1,25 +1,117 @@
-import json
 import os
+import threading
+
+from cache_io import FileWatch, read_json, remove_stale_temp_files, update_json
+from capabilities import CAPABILITY_VERSION, extract_capabilities
+from card_store import shared_capabilities
 
 CACHE_PATH = "cache/capabilities.json"
 
+
 class CapabilityCache:
-    def __init__(self):
-        self.data = self._load()
+    """
+    Extracted capabilities keyed by oracle_id, shared by every worker.
+
+    Entries are tagged with CAPABILITY_VERSION. save() is a locked
+    read-merge-write, so workers filling the cache at the same time all
+    keep their entries, and an unreadable file is quarantined on load
+    instead of crashing the app.
+
+    When the shared capability table is mapped (card_store.open_shared),
+    the JSON file is not loaded at all: lookups go to the table, and
+    `data` only holds this process's own extractions on top of it.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = {}
+        self._shared = shared_capabilities()
+        self.data = self._load() if self._shared is None else {}
+        # Picks up entries other processes (e.g. the revalidator) saved
+        self._watch = FileWatch(path)
 
     def _load(self):
-        if os.path.exists(CACHE_PATH):
-            with open(CACHE_PATH, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return {}
+        remove_stale_temp_files(os.path.dirname(self.path) or ".")
+        return read_json(self.path, {})
+
+    def _current_shared(self):
+        shared = shared_capabilities()
+        if shared is not self._shared:
+            # Table mapped, rebuilt or gone: the overlay (or full copy)
+            # it replaces is dropped, keeping only unsaved entries
+            with self._lock:
+                self._shared = shared
+                data = {} if shared is not None else read_json(self.path, {})
+                data.update(self._dirty)
+                self.data = data
+        return shared
 
     def get(self, oracle_id):
-        return self.data.get(oracle_id)
+        shared = self._current_shared()
+        if shared is None and self._watch.changed():
+            self.reload()
+
+        # Local entries first: they are newer than the table (set() by
+        # the revalidator, or extracted since the last build)
+        entry = self.data.get(oracle_id)
+        if entry and entry.get("version") == CAPABILITY_VERSION:
+            return entry["caps"]
+
+        return shared.get(oracle_id) if shared is not None else None
 
     def set(self, oracle_id, caps):
-        self.data[oracle_id] = caps
+        entry = {"version": CAPABILITY_VERSION, "caps": caps}
+        with self._lock:
+            self.data[oracle_id] = entry
+            self._dirty[oracle_id] = entry
+
+    def get_or_extract(self, card):
+        oracle_id = card.get("oracle_id")
+        if not oracle_id:
+            return extract_capabilities(card)
+
+        caps = self.get(oracle_id)
+        if caps is None:
+            caps = extract_capabilities(card)
+            self.set(oracle_id, caps)
+        return caps
 
     def save(self):
-        os.makedirs("cache", exist_ok=True)
-        with open(CACHE_PATH, "w", encoding="utf-8") as f:
-            json.dump(self.data, f, indent=2)
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+
+        if not dirty:
+            return
+
+        def merge(on_disk):
+            on_disk.update(dirty)
+            return on_disk
+
+        merged = update_json(self.path, merge)
+
+        if self._shared is not None:
+            return
+
+        # Pick up what other workers wrote since we loaded
+        with self._lock:
+            merged.update(self._dirty)
+            self.data = merged
+
+    def reload(self):
+        if self._shared is not None:
+            return
+        with self._lock:
+            data = read_json(self.path, {})
+            data.update(self._dirty)
+            self.data = data
+
+
+_cache = None
+
+
+def get_capability_cache():
+    global _cache
+    if _cache is None:
+        _cache = CapabilityCache()
+    return _cache
@@ -0,0 +1,293 @@
+"""
+Inverted index over the local card corpus for boolean card search.
+
+Every indexed key (tag, capability, type, color identity, cmc bucket,
+...) maps to a bitset of card ids stored as a Python int, so a query is
+a handful of &, | and ~ operations over the whole corpus:
+
+    index = get_card_index()
+    bits = index.search(all_of=["draw:engine"], identity="GU", cmc_max=3)
+    index.names_of(bits)
+
+Bitsets are zlib-compressed when the index is saved next to the card
+cache, and cards fetched since the last save are added on refresh().
+"""
+
+import os
+import zlib
+import marshal
+import threading
+from collections import Counter
+
+from cache_io import atomic_write, file_lock
+from capability_cache import get_capability_cache
+from card_record import RECORD_EXT, read_card_file
+from deck_table import TYPE_FLAGS
+from scryfall import CACHE_DIR
+from tags import get_tags
+
+INDEX_FORMAT = 1
+INDEX_FILE = "_card_index.bin"
+
+COLORS = ("W", "U", "B", "R", "G")
+
+# cmc buckets 0..MAX_CMC_BUCKET, the last one meaning "or more"
+MAX_CMC_BUCKET = 10
+
+
+def card_keys(card, caps):
+    """
+    Every index key a card belongs to.
+    """
+    keys = {f"tag:{tag}" for tag in get_tags(card)}
+
+    front = card.get("type_line", "").split("//")[0].split("—")[0].lower()
+    keys.update(f"type:{word}" for word in front.split() if word in TYPE_FLAGS)
+
+    is_land = "type:land" in keys
+    for mana in caps.get("mana", []):
+        keys.add("cap:mana")
+        if not is_land:
+            keys.add("cap:ramp")
+        keys.add(f"mana:{mana.get('source', 'unknown')}")
+        if mana.get("repeatable"):
+            keys.add("mana:repeatable")
+        if mana.get("enters_tapped"):
+            keys.add("mana:tapped")
+        keys.update(f"produces:{c}" for c in mana.get("produces", []))
+
+    for draw in caps.get("draw", []):
+        keys.add("cap:draw")
+        keys.add(f"draw:{draw['category']}")
+        if draw.get("repeatable"):
+            keys.add("draw:repeatable")
+        if draw.get("engine_type"):
+            keys.add(f"engine:{draw['engine_type']}")
+
+    identity = card.get("color_identity") or ()
+    keys.update(f"ci:{c}" for c in identity)
+    if not identity:
+        keys.add("ci:colorless")
+
+    cmc = card.get("cmc")
+    if isinstance(cmc, (int, float)):
+        keys.add(f"cmc:{min(int(cmc), MAX_CMC_BUCKET)}")
+
+    if card.get("commander_legality") == "legal":
+        keys.add("legal:commander")
+
+    return keys
+
+
+def _ids_of(bits):
+    # bin() is linear and runs in C; bit-by-bit shifting is quadratic
+    return [i for i, bit in enumerate(reversed(bin(bits)[2:])) if bit == "1"]
+
+
+class CardIndex:
+    def __init__(self):
+        self.names = []       # id -> canonical name
+        self.ids = {}         # lowercase name -> id
+        self.postings = {}    # key -> bitset of ids
+        self.all = 0          # bitset of every id
+        self.updated = 0.0    # newest card file mtime indexed
+        self._lock = threading.Lock()
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.names)
+
+    # ======================
+    # Building
+    # ======================
+
+    def add(self, card, caps):
+        name = card.get("name")
+        if not name:
+            return
+
+        with self._lock:
+            card_id = self.ids.get(name.lower())
+            if card_id is None:
+                card_id = len(self.names)
+                self.names.append(name)
+                self.ids[name.lower()] = card_id
+                self.all |= 1 << card_id
+            else:
+                # Re-indexed card: drop it from every key first
+                clear = ~(1 << card_id)
+                for key in self.postings:
+                    self.postings[key] &= clear
+
+            bit = 1 << card_id
+            for key in card_keys(card, caps):
+                self.postings[key] = self.postings.get(key, 0) | bit
+            self.dirty = True
+
+    def add_deck(self, deck):
+        """
+        Makes sure every card of a built deck is indexed.
+        """
+        for name in set(deck.cards):
+            card = deck.card_data.get(name.lower())
+            if card and card.get("name", "").lower() not in self.ids:
+                self.add(card, deck.card_capabilities.get(name, {}))
+
+    def refresh(self, cache_dir):
+        """
+        Indexes card files written since the last refresh.
+        """
+        if not os.path.isdir(cache_dir):
+            return
+
+        capability_cache = get_capability_cache()
+        newest = self.updated
+
+        with os.scandir(cache_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith(("_", ".")) or not entry.name.endswith((RECORD_EXT, ".json")):
+                    continue
+                mtime = entry.stat().st_mtime
+                if mtime < self.updated:
+                    continue
+                record = read_card_file(entry.path)
+                if record.name:
+                    self.add(record, capability_cache.get_or_extract(record))
+                newest = max(newest, mtime)
+
+        capability_cache.save()
+        self.updated = newest
+
+    # ======================
+    # Queries
+    # ======================
+
+    def bits(self, key):
+        return self.postings.get(key, 0)
+
+    def search(self, all_of=(), any_of=(), none_of=(), identity=None,
+               cmc_min=None, cmc_max=None):
+        """
+        Bitset of cards that have every key in all_of, at least one key in
+        any_of (if given), none of none_of, a color identity within
+        `identity` (e.g. "GU") and a cmc bucket within [cmc_min, cmc_max].
+        """
+        bits = self.all
+        for key in all_of:
+            bits &= self.bits(key)
+
+        if any_of:
+            union = 0
+            for key in any_of:
+                union |= self.bits(key)
+            bits &= union
+
+        for key in none_of:
+            bits &= ~self.bits(key)
+
+        if identity is not None:
+            allowed = set(identity.upper())
+            for c in COLORS:
+                if c not in allowed:
+                    bits &= ~self.bits(f"ci:{c}")
+
+        if cmc_min is not None or cmc_max is not None:
+            low = max(int(cmc_min or 0), 0)
+            high = min(int(cmc_max if cmc_max is not None else MAX_CMC_BUCKET), MAX_CMC_BUCKET)
+            buckets = 0
+            for cmc in range(low, high + 1):
+                buckets |= self.bits(f"cmc:{cmc}")
+            bits &= buckets
+
+        return bits
+
+    def names_of(self, bits, limit=None):
+        ids = _ids_of(bits)
+        if limit is not None:
+            ids = ids[:limit]
+        return [self.names[i] for i in ids]
+
+    @staticmethod
+    def count(bits):
+        return bin(bits).count("1")
+
+    def deck_counts(self, names, keys):
+        """
+        { label: quantity-weighted number of cards in `names` having key }
+        keys: { label: index key }
+        """
+        quantities = Counter(name.lower() for name in names)
+        ids = [(self.ids[n], qty) for n, qty in quantities.items() if n in self.ids]
+
+        counts = {}
+        for label, key in keys.items():
+            bits = self.bits(key)
+            counts[label] = sum(qty for card_id, qty in ids if bits >> card_id & 1)
+        return counts
+
+    # ======================
+    # Persistence
+    # ======================
+
+    def save(self, path):
+        with self._lock:
+            data = {
+                "format": INDEX_FORMAT,
+                "names": list(self.names),
+                "updated": self.updated,
+                "postings": {
+                    key: zlib.compress(bits.to_bytes((bits.bit_length() + 7) // 8, "little"))
+                    for key, bits in self.postings.items()
+                },
+            }
+            self.dirty = False
+
+        with file_lock(path):
+            atomic_write(path, marshal.dumps(data))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = marshal.loads(f.read())
+        if data.get("format") != INDEX_FORMAT:
+            raise ValueError("Unsupported card index format")
+
+        index = cls()
+        index.names = data["names"]
+        index.ids = {name.lower(): i for i, name in enumerate(index.names)}
+        index.all = (1 << len(index.names)) - 1
+        index.updated = data["updated"]
+        index.postings = {
+            key: int.from_bytes(zlib.decompress(blob), "little")
+            for key, blob in data["postings"].items()
+        }
+        return index
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_card_index(cache_dir=None, refresh=False):
+    """
+    Per-process index, loaded from disk and brought up to date with the
+    card cache on first use (or when refresh=True).
+    """
+    global _index
+    cache_dir = cache_dir or CACHE_DIR
+    path = os.path.join(cache_dir, INDEX_FILE)
+
+    with _index_lock:
+        if _index is None:
+            try:
+                _index = CardIndex.load(path)
+            except (OSError, ValueError, EOFError, KeyError, zlib.error):
+                _index = CardIndex()
+            refresh = True
+
+        if refresh:
+            _index.refresh(cache_dir)
+            if _index.dirty:
+                _index.save(path)
+
+    return _index
@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import marshal
+
+from cache_io import atomic_write
+
+# Bump when FIELDS changes; records in an older format are re-projected.
+RECORD_FORMAT = 1
+RECORD_EXT = ".card"
+
+# The only Scryfall fields the analyzers read
+FIELDS = (
+    "name",
+    "oracle_id",
+    "type_line",
+    "mana_cost",
+    "cmc",
+    "oracle_text",
+    "color_identity",
+    "produced_mana",
+    "keywords",
+    "commander_legality",   # legalities["commander"]
+)
+
+# Low-cardinality strings shared by many cards (and memo keys for the
+# mana cost parser): interned so every record points at one copy
+_INTERNED = {"type_line", "mana_cost", "commander_legality"}
+
+_DEFAULTS = {
+    "cmc": 0.0,
+    "color_identity": (),
+    "produced_mana": (),
+    "keywords": (),
+    "commander_legality": None,
+}
+
+
+class CardRecord:
+    """
+    Compact, read-only projection of a Scryfall card.
+
+    Supports the dict-style access the analyzers already use
+    (card.get("cmc"), card["type_line"]) without holding the ~80 field
+    Scryfall object (image URIs, prices, ...) in memory.
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, *values):
+        for field, value in zip(FIELDS, values):
+            if field in _INTERNED and isinstance(value, str):
+                value = sys.intern(value)
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CardRecord is read-only")
+
+    def __reduce__(self):
+        return (CardRecord, self.to_tuple())
+
+    # ---------- dict-style access ----------
+
+    def get(self, key, default=None):
+        if key not in FIELDS:
+            return default
+        value = getattr(self, key)
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in FIELDS and getattr(self, key) is not None
+
+    def keys(self):
+        return [f for f in FIELDS if getattr(self, f) is not None]
+
+    def to_dict(self):
+        return {
+            f: list(v) if isinstance(v, tuple) else v
+            for f in FIELDS
+            if (v := getattr(self, f)) is not None
+        }
+
+    def to_tuple(self):
+        return tuple(getattr(self, f) for f in FIELDS)
+
+    def __eq__(self, other):
+        return isinstance(other, CardRecord) and self.to_tuple() == other.to_tuple()
+
+    def __hash__(self):
+        return hash((self.name, self.oracle_id))
+
+    def __repr__(self):
+        return f"CardRecord({self.name!r})"
+
+    # ---------- projection ----------
+
+    @classmethod
+    def from_scryfall(cls, card):
+        """
+        Projects a full Scryfall card (or a dict / record) to a CardRecord.
+        Double-faced cards without top-level text get their faces joined.
+        """
+        if isinstance(card, CardRecord):
+            return card
+
+        faces = card.get("card_faces") or []
+
+        def face_join(field, sep):
+            parts = [f.get(field, "") for f in faces if f.get(field)]
+            return sep.join(parts) if parts else ""
+
+        values = []
+        for field in FIELDS:
+            if field == "commander_legality":
+                value = card.get(field) or (card.get("legalities") or {}).get("commander")
+            else:
+                value = card.get(field)
+
+            if value is None and field == "oracle_text":
+                value = face_join("oracle_text", "\n//\n")
+            elif value is None and field == "mana_cost":
+                value = face_join("mana_cost", " // ")
+            elif value is None:
+                value = _DEFAULTS.get(field, "")
+
+            if isinstance(value, list):
+                value = tuple(value)
+            values.append(value)
+
+        return cls(*values)
+
+    # ---------- binary serialization ----------
+
+    def dumps(self):
+        return marshal.dumps((RECORD_FORMAT,) + self.to_tuple())
+
+    @classmethod
+    def loads(cls, data):
+        values = marshal.loads(data)
+        if values[0] != RECORD_FORMAT:
+            raise ValueError("Unsupported card record format")
+        return cls(*values[1:])
+
+
+# ==================================================
+# Card files
+# ==================================================
+
+def read_card_file(path):
+    """
+    Reads a binary record, or projects a legacy full-JSON card file.
+    """
+    if path.endswith(RECORD_EXT):
+        with open(path, "rb") as f:
+            return CardRecord.loads(f.read())
+
+    with open(path, "r", encoding="utf-8") as f:
+        return CardRecord.from_scryfall(json.load(f))
+
+
+def write_card_file(path, record):
+    atomic_write(path, record.dumps())
+
+
+def iter_card_files(directory):
+    """
+    Yields every card record in a directory (binary and legacy JSON).
+    Underscore-prefixed files are bookkeeping, not cards.
+    """
+    if not os.path.isdir(directory):
+        return
+
+    for filename in os.listdir(directory):
+        if filename.startswith(("_", ".")):
+            continue
+        if not filename.endswith((RECORD_EXT, ".json")):
+            continue
+        record = read_card_file(os.path.join(directory, filename))
+        if record.name:
+            yield record
@@ -0,0 +1,260 @@
+"""
+Shared, read-only card and capability tables for multi-worker serving.
+
+Both tables are packed into files that every worker maps with mmap, so
+the data lives once in the OS page cache no matter how many workers
+there are. Entries are decoded on access; each worker keeps only its
+DECODED_CACHE hottest entries decoded. Build them once before starting
+the workers:
+
+    python card_store.py build
+    gunicorn --preload -w 8 web:app
+"""
+
+import os
+import sys
+import mmap
+import struct
+import marshal
+import threading
+from functools import lru_cache
+
+from cache_io import FileWatch, atomic_write, read_json
+from card_record import RECORD_FORMAT, CardRecord, iter_card_files
+from capabilities import CAPABILITY_VERSION
+
+STORE_DIR = "cache/shared"
+CARDS_FILE = "cards.bin"
+CAPABILITIES_FILE = "capabilities.bin"
+
+MAGIC = b"CDST"
+# magic, format tag, entry count
+HEADER = struct.Struct("<4sII")
+# key offset, key length, value offset, value length
+ENTRY = struct.Struct("<QIQI")
+
+# Decoded entries each worker keeps per table (the rest stay in the mapping)
+DECODED_CACHE = 4096
+
+
+# ==================================================
+# Packed table
+# ==================================================
+
+class PackedTable:
+    """
+    Read-only string -> bytes table over a memory-mapped file.
+
+    Layout: header, fixed-width entry index sorted by key, then the key
+    and value blobs. Lookups binary-search the index in place and return
+    a memoryview slice of the mapping, so nothing is copied until the
+    caller decodes the value.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+        magic, self.tag, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a packed table: {path}")
+
+    def __len__(self):
+        return self.count
+
+    def _entry(self, i):
+        return ENTRY.unpack_from(self._map, HEADER.size + i * ENTRY.size)
+
+    def _key(self, i):
+        key_off, key_len, _, _ = self._entry(i)
+        return self._map[key_off:key_off + key_len]
+
+    def get(self, key):
+        """
+        Returns a zero-copy memoryview of the value, or None.
+        """
+        target = key.encode("utf-8")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        if lo < self.count and self._key(lo) == target:
+            _, _, val_off, val_len = self._entry(lo)
+            return self._view[val_off:val_off + val_len]
+        return None
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def keys(self):
+        for i in range(self.count):
+            yield self._key(i).decode("utf-8")
+
+    def close(self):
+        self._view.release()
+        self._map.close()
+        self._file.close()
+
+    @staticmethod
+    def build(path, items, tag):
+        """
+        Writes (key, value_bytes) pairs as a packed table (atomically).
+        """
+        # duplicate keys: last one wins
+        encoded = sorted({k.encode("utf-8"): v for k, v in items}.items())
+
+        blobs_start = HEADER.size + len(encoded) * ENTRY.size
+        index = bytearray()
+        blobs = bytearray()
+
+        for key, value in encoded:
+            key_off = blobs_start + len(blobs)
+            blobs += key
+            val_off = blobs_start + len(blobs)
+            blobs += value
+            index += ENTRY.pack(key_off, len(key), val_off, len(value))
+
+        atomic_write(path, HEADER.pack(MAGIC, tag, len(encoded)) + bytes(index) + bytes(blobs))
+
+
+# ==================================================
+# Card and capability stores
+# ==================================================
+
+class SharedCardStore:
+    def __init__(self, table):
+        self.table = table
+        self._decoded = lru_cache(maxsize=DECODED_CACHE)(self._decode)
+
+    def _decode(self, key):
+        raw = self.table.get(key)
+        return CardRecord.loads(raw) if raw is not None else None
+
+    def get(self, name):
+        # Records are read-only, so decoded ones can be handed out again
+        return self._decoded(name.lower())
+
+    def __len__(self):
+        return len(self.table)
+
+
+class SharedCapabilities:
+    def __init__(self, table):
+        self.table = table
+        self._decoded = lru_cache(maxsize=DECODED_CACHE)(self._decode)
+
+    def _decode(self, oracle_id):
+        raw = self.table.get(oracle_id)
+        return marshal.loads(raw) if raw is not None else None
+
+    def get(self, oracle_id):
+        return self._decoded(oracle_id)
+
+    def __len__(self):
+        return len(self.table)
+
+
+def _open(filename, tag):
+    path = os.path.join(STORE_DIR, filename)
+    if not os.path.exists(path):
+        return None
+    try:
+        table = PackedTable(path)
+    except (ValueError, OSError):
+        return None
+    if table.tag != tag:
+        # Built by an older version: ignore until rebuilt
+        table.close()
+        return None
+    return table
+
+
+_lock = threading.Lock()
+_cards = None
+_capabilities = None
+_watch = None
+
+
+def open_shared():
+    """
+    Maps the shared tables (once per process, and again after a rebuild
+    replaces them). Call before forking workers to share the mapping
+    itself; otherwise each worker maps the same file and shares the page
+    cache.
+    """
+    global _cards, _capabilities, _watch
+    with _lock:
+        # The capability table is written last, so its change means both are new
+        if _watch is None or _watch.changed():
+            if _watch is None:
+                _watch = FileWatch(os.path.join(STORE_DIR, CAPABILITIES_FILE))
+
+            # Old mappings are not closed: readers may still hold views of
+            # them, and they are released once unreferenced
+            cards = _open(CARDS_FILE, RECORD_FORMAT)
+            caps = _open(CAPABILITIES_FILE, CAPABILITY_VERSION)
+            _cards = SharedCardStore(cards) if cards else None
+            _capabilities = SharedCapabilities(caps) if caps else None
+    return _cards, _capabilities
+
+
+def shared_cards():
+    return open_shared()[0]
+
+
+def shared_capabilities():
+    return open_shared()[1]
+
+
+# ==================================================
+# Build
+# ==================================================
+
+def build(card_dir=None):
+    """
+    Packs every cached card (and its capabilities) into the shared tables.
+    Capabilities come from the JSON cache, then the current table, and are
+    extracted otherwise; the JSON cache itself is left as it is.
+    """
+    from capability_cache import CACHE_PATH, get_capability_cache
+    from capabilities import extract_capabilities
+    from scryfall import CACHE_DIR
+
+    # Read once here, in the (usually one-off) build process
+    saved = read_json(CACHE_PATH, {})
+    capability_cache = get_capability_cache()
+    cards = []
+    capabilities = []
+
+    for record in iter_card_files(card_dir or CACHE_DIR):
+        cards.append((record.name.lower(), record.dumps()))
+        if record.oracle_id:
+            entry = saved.get(record.oracle_id)
+            if entry and entry.get("version") == CAPABILITY_VERSION:
+                caps = entry["caps"]
+            else:
+                caps = capability_cache.get(record.oracle_id) or extract_capabilities(record)
+            capabilities.append((record.oracle_id, marshal.dumps(caps)))
+
+    PackedTable.build(os.path.join(STORE_DIR, CARDS_FILE), cards, RECORD_FORMAT)
+    PackedTable.build(os.path.join(STORE_DIR, CAPABILITIES_FILE), capabilities, CAPABILITY_VERSION)
+
+    # This process remaps right away instead of on its next file check
+    global _watch
+    with _lock:
+        _watch = None
+
+    return len(cards), len(capabilities)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["build"]:
+        sys.exit("usage: python card_store.py build")
+    n_cards, n_caps = build()
+    print(f"Packed {n_cards} cards and {n_caps} capability entries into {STORE_DIR}/")
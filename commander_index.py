@@ -0,0 +1,232 @@
+"""
+Precomputed commander intents for every legal commander in the local
+card corpus, stored in SQLite and indexed by strategy and color identity.
+
+    python commander_index.py build [--workers 8]
+
+The build runs oracle_parser.analyze_commander over the corpus in a
+process pool; request-time lookups are indexed queries only and return
+nothing until the index has been built.
+"""
+
+import os
+import sqlite3
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from card_record import iter_card_files
+from hand_table import COLOR_BITS, color_mask
+from oracle_parser import analyze_commander
+
+INDEX_PATH = "cache/commanders.sqlite"
+
+CHUNK_SIZE = 200
+ALL_COLORS = 0b11111
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commanders (
+    name TEXT PRIMARY KEY,
+    oracle_id TEXT,
+    color_mask INTEGER NOT NULL,
+    cmc REAL,
+    primary_strategy TEXT NOT NULL,
+    explanation TEXT
+);
+CREATE TABLE IF NOT EXISTS commander_strategies (
+    name TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    is_primary INTEGER NOT NULL,
+    color_mask INTEGER NOT NULL,
+    PRIMARY KEY (strategy, color_mask, name)
+);
+CREATE INDEX IF NOT EXISTS commanders_by_colors
+    ON commanders (color_mask, primary_strategy);
+"""
+
+
+def is_commander(card):
+    if card.get("commander_legality") != "legal":
+        return False
+    front = card.get("type_line", "").split("//")[0].lower()
+    if "legendary" in front and "creature" in front:
+        return True
+    return "can be your commander" in card.get("oracle_text", "").lower()
+
+
+def subset_masks(mask):
+    """
+    Every color mask within `mask` (including colorless).
+    """
+    subsets = []
+    sub = mask
+    while True:
+        subsets.append(sub)
+        if sub == 0:
+            break
+        sub = (sub - 1) & mask
+    return subsets
+
+
+# ==================================================
+# Build
+# ==================================================
+
+def _analyze_chunk(chunk):
+    """
+    Process-pool worker: [(name, oracle_id, mask, cmc, oracle)] -> rows.
+    """
+    rows = []
+    for name, oracle_id, mask, cmc, oracle in chunk:
+        intent = analyze_commander(oracle)
+        rows.append((name, oracle_id, mask, cmc, intent.primary, intent.secondary, intent.explanation))
+    return rows
+
+
+def _connect(path, readonly=False):
+    if readonly:
+        return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    return sqlite3.connect(path)
+
+
+def build(card_dir=None, path=INDEX_PATH, workers=None):
+    """
+    Rebuilds the index from every legal commander in the card cache.
+    Returns the number of commanders indexed.
+    """
+    from scryfall import CACHE_DIR
+
+    candidates = [
+        (
+            card.name,
+            card.oracle_id,
+            color_mask(card.get("color_identity", ())),
+            card.get("cmc"),
+            card.get("oracle_text", ""),
+        )
+        for card in iter_card_files(card_dir or CACHE_DIR)
+        if is_commander(card)
+    ]
+    chunks = [candidates[i:i + CHUNK_SIZE] for i in range(0, len(candidates), CHUNK_SIZE)]
+
+    if workers == 1 or len(chunks) <= 1:
+        results = map(_analyze_chunk, chunks)
+        rows = [row for chunk in results for row in chunk]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = [row for chunk in pool.map(_analyze_chunk, chunks) for row in chunk]
+
+    # Build into a temp file and swap it in, so readers never see a
+    # half-written index
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = _connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+        conn.executemany(
+            "INSERT OR REPLACE INTO commanders VALUES (?, ?, ?, ?, ?, ?)",
+            [(name, oid, mask, cmc, primary, explanation)
+             for name, oid, mask, cmc, primary, _, explanation in rows]
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO commander_strategies VALUES (?, ?, ?, ?)",
+            [
+                (name, strategy, int(strategy == primary), mask)
+                for name, _, mask, _, primary, secondary, _ in rows
+                for strategy in [primary, *secondary]
+            ]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+    return len(rows)
+
+
+# ==================================================
+# Queries
+# ==================================================
+
+def find_commanders(strategies=None, colors=None, exact=False, primary_only=True,
+                    limit=20, path=INDEX_PATH):
+    """
+    Commanders whose (primary) strategy is any of `strategies` and whose
+    color identity is within `colors` (or exactly `colors` if exact).
+    Returns [] if the index has not been built.
+    """
+    if not os.path.exists(path):
+        return []
+
+    mask = color_mask(colors.upper()) if colors is not None else ALL_COLORS
+    masks = [mask] if exact else subset_masks(mask)
+    mask_marks = ",".join("?" * len(masks))
+
+    if strategies:
+        strategy_marks = ",".join("?" * len(strategies))
+        sql = f"""
+            SELECT c.name, c.color_mask, c.cmc, c.primary_strategy, c.explanation
+            FROM commander_strategies s
+            JOIN commanders c ON c.name = s.name
+            WHERE s.strategy IN ({strategy_marks})
+              AND s.color_mask IN ({mask_marks})
+              {"AND s.is_primary = 1" if primary_only else ""}
+            GROUP BY c.name
+            ORDER BY c.name
+            LIMIT ?
+        """
+        params = [*strategies, *masks, limit]
+    else:
+        sql = f"""
+            SELECT name, color_mask, cmc, primary_strategy, explanation
+            FROM commanders
+            WHERE color_mask IN ({mask_marks})
+            ORDER BY name
+            LIMIT ?
+        """
+        params = [*masks, limit]
+
+    conn = _connect(path, readonly=True)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+    return [
+        {
+            "name": name,
+            "color_identity": [c for c, bit in COLOR_BITS.items() if mask & bit],
+            "cmc": cmc,
+            "primary": primary,
+            "explanation": explanation,
+        }
+        for name, mask, cmc, primary, explanation in rows
+    ]
+
+
+def suggest_commanders(deck, limit=5):
+    """
+    Other commanders in the deck's colors that share its primary strategy.
+    """
+    strategy = deck.commander_intent.primary
+    name = deck.commander.get("name", "")
+    colors = "".join(deck.commander.get("color_identity", []))
+
+    matches = find_commanders([strategy], colors=colors, limit=limit + 1)
+    return [c for c in matches if c["name"] != name][:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Commander intent index")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    count = build(workers=args.workers)
+    print(f"Indexed {count} commanders into {INDEX_PATH}")
+
+
+if __name__ == "__main__":
+    main()
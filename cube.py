@@ -0,0 +1,296 @@
+"""
+Cube and large-pool analysis on a quantity multiset.
+
+A cube (360-720 cards, usually one of each) is never played as-is, so it
+is judged by the decks it produces: thousands of 40-card decks are
+sampled from packs opened out of the pool and each is scored for color
+balance and mana consistency.
+
+    python cube.py my_cube.txt --decks 2000
+
+Every distinct card is reduced once to small ints (color identity mask,
+produced-color mask, pips, cmc), so a sampled deck is built and scored
+with integer ops and memoized hypergeometric terms only.
+"""
+
+import random
+import argparse
+from collections import Counter
+from functools import lru_cache
+from itertools import combinations
+
+from deck_table import COLORS, LAND, DeckTable
+from hand_table import COLOR_BITS, color_mask
+from hypergeom import at_least
+from pipeline import build_pool
+
+PACKS = 3
+PACK_SIZE = 15
+DECK_SIZE = 40
+LAND_COUNT = 17
+MAX_DECKS = 20_000
+
+# Per API request: sampling runs inside the request, so keep it interactive
+MAX_API_DECKS = 5000
+
+# "Has both colors by turn N"
+EARLY_TURN = 3
+
+PAIRS = ["".join(pair) for pair in combinations(COLORS, 2)]
+
+
+@lru_cache(maxsize=None)
+def _castable(pips, sources, cmc, deck_size):
+    """
+    P(at least `pips` sources of a color among the cards seen by the
+    turn a spell of mana value cmc comes down).
+    """
+    if pips == 0:
+        return 1.0
+    return at_least(pips, deck_size, sources, 7 + max(cmc, 1) - 1)
+
+
+class Cube:
+    """
+    A card pool as a multiset plus per-card ints for fast sampling.
+    """
+
+    def __init__(self, counts, card_data, card_capabilities):
+        self.counts = counts
+        self.table = DeckTable.from_counts(counts, card_data)
+
+        self.is_land = []
+        self.identity = []   # color identity mask
+        self.produces = []   # colors a land taps for, as a mask
+        self.pips = []       # (W, U, B, R, G) pip counts
+        self.cmc = []
+
+        for row, types, cmc, pips, _, _ in self.table.rows():
+            name = self.table.names[row]
+            caps = card_capabilities.get(name, {})
+            produced = set()
+            for mana in caps.get("mana", []):
+                produced.update(mana.get("produces", []))
+
+            self.is_land.append(bool(types & LAND))
+            self.identity.append(color_mask(card_data[name.lower()].get("color_identity", ())))
+            self.produces.append(color_mask(produced))
+            self.pips.append(tuple(pips[:len(COLORS)]))
+            self.cmc.append(int(cmc or 0))
+
+        # Row ids expanded by quantity: sampling packs is rng.sample on ints
+        self.pool = [
+            row for row, qty in enumerate(self.table.quantity) for _ in range(qty)
+        ]
+
+
+    @classmethod
+    def from_deck(cls, deck):
+        """
+        Cube over a commander-less Deck (pipeline.build_pool).
+        """
+        return cls(Counter(deck.cards), deck.card_data, deck.card_capabilities)
+    def __len__(self):
+        return len(self.pool)
+
+    # ======================
+    # Deck building
+    # ======================
+
+    def _colors(self, picks, rng):
+        """
+        The two colors with the most nonland picks (ties broken randomly).
+        """
+        weight = dict.fromkeys(COLORS, 0)
+        for row in picks:
+            if self.is_land[row]:
+                continue
+            mask = self.identity[row]
+            for c in COLORS:
+                if mask & COLOR_BITS[c]:
+                    weight[c] += 1
+
+        ranked = sorted(COLORS, key=lambda c: (weight[c], rng.random()), reverse=True)
+        return "".join(c for c in COLORS if c in ranked[:2])
+
+    def build_deck(self, picks, rng, deck_size=DECK_SIZE, land_count=LAND_COUNT):
+        """
+        A two-color deck from a set of picks: on-color spells, on-color
+        lands from the picks, basics for the rest split by pip share.
+        Returns (colors, spell rows, nonbasic land rows, basics by color).
+        """
+        colors = self._colors(picks, rng)
+        allowed = color_mask(colors)
+
+        spells = [
+            row for row in picks
+            if not self.is_land[row] and not self.identity[row] & ~allowed
+        ][:deck_size - land_count]
+
+        lands = [
+            row for row in picks
+            if self.is_land[row] and self.produces[row] & allowed
+        ][:land_count]
+
+        # Short on playables: the rest of the 40 are basics too
+        n_basics = deck_size - len(spells) - len(lands)
+        demand = {c: 0 for c in colors}
+        for row in spells:
+            for c, pips in zip(COLORS, self.pips[row]):
+                if c in demand:
+                    demand[c] += pips
+
+        total = sum(demand.values())
+        basics = {}
+        for i, c in enumerate(colors):
+            if i == len(colors) - 1:
+                basics[c] = n_basics - sum(basics.values())
+            else:
+                share = demand[c] / total if total else 1 / len(colors)
+                basics[c] = round(n_basics * share)
+
+        return colors, spells, lands, basics
+
+    # ======================
+    # Scoring
+    # ======================
+
+    def score(self, spells, lands, basics, deck_size=DECK_SIZE):
+        """
+        Mana consistency of one deck: sources per color, the chance of
+        having both colors by EARLY_TURN and of casting the average spell on
+        curve (each colored requirement treated independently).
+        """
+        sources = dict(basics)
+        for row in lands:
+            mask = self.produces[row]
+            for c in sources:
+                if mask & COLOR_BITS[c]:
+                    sources[c] += 1
+
+        early = {
+            c: _castable(1, sources[c], EARLY_TURN, deck_size)
+            for c in sources
+        }
+
+        on_curve = 0.0
+        for row in spells:
+            p = 1.0
+            for c, pips in zip(COLORS, self.pips[row]):
+                if pips:
+                    p *= _castable(pips, sources.get(c, 0), self.cmc[row], deck_size)
+            on_curve += p
+
+        return {
+            "sources": sources,
+            "both_colors_by_t3": min(early.values()) if early else 1.0,
+            "on_curve": on_curve / len(spells) if spells else 0.0,
+        }
+
+    # ======================
+    # Sampling
+    # ======================
+
+    def sample(self, decks=2000, seed=0, packs=PACKS, pack_size=PACK_SIZE,
+               deck_size=DECK_SIZE, land_count=LAND_COUNT):
+        """
+        Builds and scores `decks` decks, each from packs * pack_size cards
+        drawn without replacement from the pool.
+        """
+        if decks < 1:
+            raise ValueError("decks must be at least 1")
+
+        rng = random.Random(seed)
+        picks_per_deck = min(packs * pack_size, len(self.pool))
+
+        pairs = Counter()
+        playables = 0
+        short = 0
+        both_t3 = 0.0
+        on_curve = 0.0
+        color_share = Counter()
+
+        for _ in range(decks):
+            picks = rng.sample(self.pool, picks_per_deck)
+            colors, spells, lands, basics = self.build_deck(picks, rng, deck_size, land_count)
+            scored = self.score(spells, lands, basics, deck_size)
+
+            pairs[colors] += 1
+            playables += len(spells)
+            if len(spells) < deck_size - land_count:
+                short += 1
+            both_t3 += scored["both_colors_by_t3"]
+            on_curve += scored["on_curve"]
+            for c in colors:
+                color_share[c] += 1
+
+        return {
+            "pool_size": len(self.pool),
+            "unique_cards": len(self.table),
+            "decks": decks,
+            "picks_per_deck": picks_per_deck,
+            "color_pairs": {
+                pair: round(pairs[pair] / decks * 100, 1) for pair in PAIRS if pairs[pair]
+            },
+            "color_presence": {
+                c: round(color_share[c] / decks * 100, 1) for c in COLORS
+            },
+            "avg_playables": round(playables / decks, 2),
+            "short_deck_pct": round(short / decks * 100, 1),
+            "both_colors_by_t3": round(both_t3 / decks, 3),
+            "avg_on_curve": round(on_curve / decks, 3),
+            "composition": self.composition(),
+        }
+
+    def composition(self):
+        """
+        Quantity-weighted card counts per color (multicolor counted in
+        each of its colors), colorless and lands.
+        """
+        counts = Counter()
+        for row, qty in enumerate(self.table.quantity):
+            if self.is_land[row]:
+                counts["land"] += qty
+                continue
+            mask = self.identity[row]
+            if not mask:
+                counts["colorless"] += qty
+            for c in COLORS:
+                if mask & COLOR_BITS[c]:
+                    counts[c] += qty
+        return dict(counts)
+
+
+def load_cube(pool_text):
+    """
+    pool text -> (Cube, unresolved), built from the same commander-less
+    Deck as pipeline.build_pool.
+    """
+    pool = build_pool(pool_text)
+    return Cube.from_deck(pool), pool.unresolved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sample draft decks from a cube")
+    parser.add_argument("pool", help="cube list file")
+    parser.add_argument("--decks", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.decks < 1:
+        parser.error("--decks must be at least 1")
+
+    cube, unresolved = load_cube(args.pool)
+    if unresolved:
+        print(f"⚠️ {len(unresolved)} cards could not be resolved")
+
+    result = cube.sample(decks=min(args.decks, MAX_DECKS), seed=args.seed)
+    print(f"{result['pool_size']} cards, {result['decks']} sampled decks")
+    for pair, pct in sorted(result["color_pairs"].items(), key=lambda kv: -kv[1]):
+        print(f"  {pair}: {pct}%")
+    print(f"Avg playables: {result['avg_playables']}  (short decks: {result['short_deck_pct']}%)")
+    print(f"Both colors by turn 3: {result['both_colors_by_t3']:.1%}")
+    print(f"Avg spell castable on curve: {result['avg_on_curve']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,73 @@
-from oracle_parser import analyze_commander, parse_mana_cost
-from simulations import simulate_mulligans
+from collections import Counter
+
+from analysis import commander_on_curve_probability
+from deck_table import COLORS
+from oracle_parser import PIP_FIELDS, analyze_commander, pip_vector
+from sim_store import get_store
+
+
+def _combined(commanders):
+    """
+    One card-like view of any number of commanders (partners share a
+    color identity); {} for a deck without one.
+    """
+    if len(commanders) == 1:
+        return commanders[0]
+
+    identity = set()
+    for commander in commanders:
+        identity.update(commander.get("color_identity", []))
+    return {
+        "name": " + ".join(c.get("name", "") for c in commanders),
+        "color_identity": [c for c in COLORS if c in identity],
+        "oracle_text": "\n".join(c.get("oracle_text", "") for c in commanders),
+    }
 
 
 class Deck:
-    def __init__(self, cards, commander):
-        if isinstance(commander, list):
-            commander = commander[0]
+    """
+    A multiset of cards (flat list of names, one per copy) plus its
+    commanders: one card, a list of cards (partners), or None for a
+    deck without a commander such as a cube, draft pool or 40-card deck.
+    """
+
+    def __init__(self, cards, commander=None):
+        if commander is None:
+            commanders = []
+        elif isinstance(commander, list):
+            commanders = list(commander)
+        else:
+            commanders = [commander]
 
         self.cards = cards
-        self.commander = commander
+        self.commanders = commanders
+        self.commander = _combined(commanders)
+        self.commander_colors = set(self.commander.get("color_identity", []))
         self.card_capabilities = {}
+        self.card_data = {}
+        self.unresolved = []
         self.commander_intent = None
 
         self._analyze_commander()
 
+    @classmethod
+    def from_counts(cls, counts, card_data, card_capabilities, commander=None):
+        """
+        Deck from a { name: quantity } multiset of any size (parse_pool,
+        DeckTable.from_counts). Without a commander, the deck's colors are
+        those of the cards in it.
+        """
+        deck = cls([name for name, qty in counts.items() for _ in range(qty)], commander)
+        deck.card_data = card_data
+        deck.card_capabilities = card_capabilities
+
+        if commander is None:
+            for name in counts:
+                card = card_data.get(name.lower())
+                if card:
+                    deck.commander_colors.update(card.get("color_identity", []))
+        return deck
+
     def _analyze_commander(self):
         oracle = self.commander.get("oracle_text", "")
         self.commander_intent = analyze_commander(oracle)
@@ -30,13 +84,15 @@ class Deck:
         burst_draw = 0
         draw_engines = 0
 
-        commander_colors = set(self.commander.get("color_identity", []))
+        commander_colors = [c for c in COLORS if c in self.commander_colors]
 
         # 🔹 LAND-ONLY mana sources (tap-based)
         mana_sources = {c: 0 for c in commander_colors}
         mana_demand = {c: 0 for c in commander_colors}
 
-        for name in self.cards:
+        # Once per distinct card, weighted by quantity: a 720-card cube
+        # costs what its unique cards do
+        for name, qty in Counter(self.cards).items():
             caps = self.card_capabilities.get(name, {})
             card = caps.get("card", {})
 
@@ -44,7 +100,7 @@ class Deck:
 
             # ---------- LAND COUNT ----------
             if is_land:
-                lands += 1
+                lands += qty
 
                 # Count how many colors this land can tap for
                 produces = set()
@@ -53,26 +109,26 @@ class Deck:
 
                 for c in produces:
                     if c in mana_sources:
-                        mana_sources[c] += 1
+                        mana_sources[c] += qty
 
             # ---------- RAMP (unchanged) ----------
             if not is_land and caps.get("mana"):
-                ramp += 1
+                ramp += qty
 
             # ---------- DRAW ----------
             for d in caps.get("draw", []):
                 if d["category"] == "cantrip":
-                    cantrips += 1
+                    cantrips += qty
                 elif d["category"] == "burst":
-                    burst_draw += 1
+                    burst_draw += qty
                 elif d["category"] == "engine":
-                    draw_engines += 1
+                    draw_engines += qty
 
             # ---------- MANA SATURATION ----------
-            pip_counts = parse_mana_cost(card.get("mana_cost", ""))
-            for color, count in pip_counts.items():
-                if color in mana_demand:
-                    mana_demand[color] += count
+            pips = pip_vector(card.get("mana_cost", ""))
+            for color, count in zip(PIP_FIELDS, pips):
+                if count and color in mana_demand:
+                    mana_demand[color] += count * qty
 
         # ---------- SATURATION MATH ----------
         total_pips = sum(mana_demand.values())
@@ -94,19 +150,22 @@ class Deck:
                 for c in commander_colors
             }
 
-        mulligans = simulate_mulligans(
-            cards=self.cards,
-            card_capabilities=self.card_capabilities,
-            color_identity=list(commander_colors),
-            simulations=5000
-        )
+        # Seeded + stored: repeat analyses of the same deck are free.
+        # Stratified sampling matches 5000 plain shuffles with far fewer hands.
+        mulligans = get_store().run(self, "hand_quality_stratified", iterations=2000)
 
         return {
+            # Without a commander: name and on_curve_pct are None, and the
+            # colors are the deck's own
             "commander": {
-                "name": self.commander.get("name"),
+                "name": self.commander.get("name") or None,
                 "color_identity": list(commander_colors),
                 "playstyle": self.commander_intent.primary,
                 "explanation": self.commander_intent.explanation,
+                "on_curve_pct": (
+                    round(commander_on_curve_probability(self), 1)
+                    if self.commanders else None
+                ),
             },
             "counts": {
                 "lands": lands,
@@ -1,3 +1,6 @@
+from collections import Counter
+
+
 def parse_deck(input_data):
     """
     Accepts either:
@@ -43,3 +46,39 @@ def parse_deck(input_data):
         commander = name
 
     return flat_cards, unique_cards, commander
+
+
+def parse_pool(input_data):
+    """
+    Parses a card pool (cube list, draft pool, ...) with no commander.
+    Accepts the same inputs as parse_deck; lines may also be a bare card
+    name (quantity 1) or "2x Name".
+
+    Returns:
+    - counts: Counter[str]      (name -> quantity, in list order)
+    """
+
+    if "\n" in input_data:
+        lines = input_data.splitlines()
+    else:
+        with open(input_data, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+
+    counts = Counter()
+
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith(("#", "//")):
+            continue
+
+        qty, _, name = line.partition(" ")
+        try:
+            qty = int(qty.rstrip("xX"))
+        except ValueError:
+            qty, name = 1, line
+
+        name = name.strip()
+        if name and qty > 0:
+            counts[name] += qty
+
+    return counts
@@ -1,4 +1,5 @@
-from collections import Counter, defaultdict
+from collections import Counter
+from deck_table import COLORS, LAND, DeckTable
 from hypergeom import at_least, at_least_one
 
 
@@ -7,6 +8,8 @@ class DeckProfile:
         self.deck = deck
         self.analysis = analysis
         self.cards = deck.card_data  # pre-fetched card data
+        self.table = DeckTable.from_deck(deck)
+        self._totals = None
 
     def build(self):
         consistency = self.consistency_profile()
@@ -28,26 +31,69 @@ class DeckProfile:
             "summary": self.summary()
         }
 
+    # ======================
+    # Single pass aggregation
+    # ======================
+
+    def totals(self):
+        """
+        Every card-level section is computed from these totals, gathered
+        in ONE quantity-weighted scan over the deck table.
+        """
+        if self._totals is not None:
+            return self._totals
+
+        total_cmc = 0
+        counted_spells = 0
+        pip_counts = Counter()
+        producing_lands = Counter()
+        effective_sources = Counter()
+
+        for _, types, cmc, pips, produced, qty in self.table.rows():
+            is_land = types & LAND
+
+            # Identity
+            if not is_land and cmc is not None:
+                total_cmc += cmc * qty
+                counted_spells += qty
+
+            # Color demand (colored slots lead the vector, hybrids included)
+            for color, count in zip(COLORS, pips):
+                if count:
+                    pip_counts[color] += count * qty
+
+            # Mana supply
+            if is_land and produced:
+                share = qty / len(produced)
+                for c in produced:
+                    producing_lands[c] += qty
+                    effective_sources[c] += share
+
+        self._totals = {
+            "total_cmc": total_cmc,
+            "counted_spells": counted_spells,
+            "pip_counts": pip_counts,
+            "producing_lands": producing_lands,
+            "effective_sources": effective_sources,
+        }
+        return self._totals
+
     # ======================
     # Identity
     # ======================
 
     def identity(self):
+        totals = self.totals()
+
         deck_size = len(self.deck.cards)
         land_count = self.analysis["counts"]["lands"]
         spell_count = deck_size - land_count
 
-        total_cmc = 0
-        counted_spells = 0
-
-        for card in self.cards.values():
-            if not card["type_line"].lower().startswith("land"):
-                cmc = card.get("cmc")
-                if cmc is not None:
-                    total_cmc += cmc
-                    counted_spells += 1
-
-        avg_cmc = round(total_cmc / counted_spells, 2) if counted_spells else 0
+        counted_spells = totals["counted_spells"]
+        avg_cmc = (
+            round(totals["total_cmc"] / counted_spells, 2)
+            if counted_spells else 0
+        )
 
         return {
             "deck_size": deck_size,
@@ -62,38 +108,20 @@ class DeckProfile:
     # ======================
 
     def color_demand(self):
-        pip_counts = Counter()
-
-        for card in self.cards.values():
-            for c in card.get("mana_cost", ""):
-                if c in "WUBRG":
-                    pip_counts[c] += 1
-
-        return {"pips": dict(pip_counts)}
+        return {"pips": dict(self.totals()["pip_counts"])}
 
     # ======================
     # Mana Supply
     # ======================
 
     def mana_supply(self):
-        producing_lands = Counter()
-        effective_sources = Counter()
-
-        for card in self.cards.values():
-            if not card["type_line"].lower().startswith("land"):
-                continue
-
-            produced = card.get("produced_mana", [])
-            if not produced:
-                continue
-
-            for c in produced:
-                producing_lands[c] += 1
-                effective_sources[c] += 1 / len(produced)
+        totals = self.totals()
 
         return {
-            "producing_lands": dict(producing_lands),
-            "effective_sources": {c: round(v, 2) for c, v in effective_sources.items()},
+            "producing_lands": dict(totals["producing_lands"]),
+            "effective_sources": {
+                c: round(v, 2) for c, v in totals["effective_sources"].items()
+            },
         }
 
     # ======================
@@ -0,0 +1,291 @@
+"""
+Near-duplicate lookup over every deck the app has built.
+
+Each deck's set of unique card names (commander included, basic lands
+left out) is MinHash-signed, and the signature is split into BANDS bands
+of ROWS values. Decks sharing any band bucket are candidates; only those
+are scored, so a lookup touches a handful of rows instead of comparing
+against every stored deck:
+
+    index = get_similarity_index()
+    index.add(deck_hash, commander, cards)
+    index.query(cards, k=10)
+
+With 32 bands of 4 rows, decks with Jaccard similarity around 0.42 have
+even odds of becoming candidates, and decks above 0.7 almost always do.
+Decks are added in the background as they are built (pipeline.load_deck),
+and the index lives in SQLite next to the other caches.
+
+    python deck_similarity.py query deck.txt [-k 10]
+"""
+
+import os
+import random
+import sqlite3
+import hashlib
+import argparse
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+
+INDEX_PATH = "cache/deck_similarity.sqlite"
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+# Candidates scored per query, best band overlap first
+MAX_CANDIDATES = 500
+
+# Above this, a stored deck is reported as a near-duplicate
+NEAR_DUPLICATE = 0.9
+
+BASIC_LANDS = {
+    "plains", "island", "swamp", "mountain", "forest", "wastes",
+    "snow-covered plains", "snow-covered island", "snow-covered swamp",
+    "snow-covered mountain", "snow-covered forest", "snow-covered wastes",
+}
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Fixed seed: signatures must match across processes and restarts
+_rng = random.Random(0x5EED)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+SCHEMA = """
+PRAGMA journal_mode=WAL;
+CREATE TABLE IF NOT EXISTS decks (
+    deck_hash TEXT PRIMARY KEY,
+    commander TEXT NOT NULL,
+    cards TEXT NOT NULL,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS buckets (
+    bucket INTEGER NOT NULL,
+    deck_hash TEXT NOT NULL,
+    PRIMARY KEY (bucket, deck_hash)
+) WITHOUT ROWID;
+"""
+
+
+# ==================================================
+# MinHash
+# ==================================================
+
+def card_set(commander_name, card_names):
+    """
+    The set a deck is compared on: unique lowercase names, no basics.
+    """
+    cards = {name.strip().lower() for name in card_names}
+    cards.add(commander_name.strip().lower())
+    return frozenset(cards - BASIC_LANDS)
+
+
+@lru_cache(maxsize=65536)
+def _base_hash(name):
+    return int.from_bytes(hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def minhash(cards):
+    """
+    NUM_PERM-value MinHash signature of a set of card names.
+    """
+    if not cards:
+        return (_MAX_HASH,) * NUM_PERM
+
+    hashes = [_base_hash(name) for name in cards]
+    return tuple(
+        min((a * h + b) % _PRIME for h in hashes) & _MAX_HASH
+        for a, b in _PERMS
+    )
+
+
+def band_buckets(signature):
+    """
+    One bucket per band: a stable 63-bit hash of the band number and its
+    rows, so a single indexed IN (...) finds every band's matches.
+    """
+    buckets = []
+    for band in range(BANDS):
+        rows = array("I", [band, *signature[band * ROWS:(band + 1) * ROWS]]).tobytes()
+        digest = hashlib.blake2b(rows, digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "little") >> 1)
+    return buckets
+
+
+def estimate(sig_a, sig_b):
+    """
+    Jaccard estimate: the fraction of signature slots that agree.
+    """
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+def jaccard(a, b):
+    union = len(a | b)
+    return len(a & b) / union if union else 1.0
+
+
+# ==================================================
+# Index
+# ==================================================
+
+class DeckSimilarityIndex:
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # A connection per call: cheap, and safe from any thread
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM decks").fetchone()[0]
+
+    def add(self, deck_hash, commander, cards):
+        """
+        Adds a deck (a card_set) unless it is already indexed.
+        Returns True if it was added.
+        """
+        signature = minhash(cards)
+        with self._connect() as conn:
+            added = conn.execute(
+                "INSERT OR IGNORE INTO decks VALUES (?, ?, ?, ?)",
+                (deck_hash, commander, "\n".join(sorted(cards)), array("I", signature).tobytes())
+            ).rowcount
+            if added:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO buckets VALUES (?, ?)",
+                    [(bucket, deck_hash) for bucket in band_buckets(signature)]
+                )
+        return bool(added)
+
+    def query(self, cards, k=10, exclude=None):
+        """
+        The k stored decks most similar to a card_set, best first, each
+        with its MinHash estimate, exact Jaccard and card diff.
+        """
+        signature = minhash(cards)
+        buckets = band_buckets(signature)
+        marks = ",".join("?" * len(buckets))
+
+        with self._connect() as conn:
+            candidates = conn.execute(
+                f"""
+                SELECT d.deck_hash, d.commander, d.cards, d.signature
+                FROM (
+                    SELECT deck_hash, COUNT(*) AS shared
+                    FROM buckets
+                    WHERE bucket IN ({marks})
+                    GROUP BY deck_hash
+                    ORDER BY shared DESC
+                    LIMIT ?
+                ) c
+                JOIN decks d ON d.deck_hash = c.deck_hash
+                """,
+                [*buckets, MAX_CANDIDATES]
+            ).fetchall()
+
+        results = []
+        for deck_hash, commander, stored_cards, stored_signature in candidates:
+            if deck_hash == exclude:
+                continue
+            other = frozenset(stored_cards.split("\n"))
+            results.append({
+                "deck_hash": deck_hash,
+                "commander": commander,
+                "estimate": round(estimate(signature, array("I", stored_signature)), 3),
+                "jaccard": round(jaccard(cards, other), 3),
+                "only_here": sorted(cards - other),
+                "only_there": sorted(other - cards),
+            })
+
+        results.sort(key=lambda r: (r["jaccard"], r["estimate"]), reverse=True)
+        for result in results[:k]:
+            result["near_duplicate"] = result["jaccard"] >= NEAR_DUPLICATE
+        return results[:k]
+
+
+_index = None
+
+
+def get_similarity_index():
+    global _index
+    if _index is None:
+        _index = DeckSimilarityIndex()
+    return _index
+
+
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer():
+    # One writer thread per process (threads do not survive a fork)
+    global _writer, _writer_pid
+    with _writer_lock:
+        if _writer is None or _writer_pid != os.getpid():
+            _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="similarity-index")
+            _writer_pid = os.getpid()
+        return _writer
+
+
+def _add(deck_hash, commander, cards):
+    try:
+        get_similarity_index().add(deck_hash, commander, cards)
+    except sqlite3.Error as e:
+        print(f"⚠️ Deck similarity index not updated: {e}")
+
+
+def add_deck(deck, deck_hash):
+    """
+    Queues a built deck for indexing (called by pipeline.load_deck). The
+    MinHash and the SQLite write happen on a background thread, so a busy
+    database never holds up or fails the request.
+    """
+    commander = deck.commander.get("name", "")
+    _get_writer().submit(_add, deck_hash, commander, card_set(commander, deck.cards))
+
+
+def similar_decks(decklist, k=10):
+    """
+    decklist text -> top-k similar stored decks (the deck itself excluded).
+    """
+    from deck_parser import parse_deck
+    from sim_store import cards_hash
+
+    flat_cards, unique_cards, commander_name = parse_deck(decklist)
+    if not commander_name:
+        return []
+    return get_similarity_index().query(
+        card_set(commander_name, unique_cards), k=k,
+        exclude=cards_hash(commander_name, flat_cards)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find stored decks similar to a decklist")
+    parser.add_argument("command", choices=["query"])
+    parser.add_argument("decklist", help="decklist file")
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    for match in similar_decks(args.decklist, k=args.k):
+        print(f"{match['jaccard']:.2f} (~{match['estimate']:.2f})  {match['commander']}  "
+              f"{match['deck_hash'][:12]}  +{len(match['only_there'])} -{len(match['only_here'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import time
+import secrets
+import threading
+from collections import OrderedDict
+
+# Built decks kept per process; the oldest are evicted first
+MAX_DECKS = 256
+DECK_TTL = 30 * 60
+
+
+class DeckStore:
+    """
+    Short-lived, bounded store of built Decks keyed by an opaque handle.
+
+    /analyze puts the deck it built here and hands the id to the page, so
+    follow-up requests (mulligans, sweep, optimize) skip parsing, fetching
+    and capability extraction. Entries expire after `ttl` seconds and the
+    least recently used deck is evicted once `max_decks` is reached.
+    """
+
+    def __init__(self, max_decks=MAX_DECKS, ttl=DECK_TTL, clock=time.monotonic):
+        self.max_decks = max_decks
+        self.ttl = ttl
+        self.clock = clock
+        self._decks = OrderedDict()   # deck_id -> (expires_at, decklist, deck)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._decks)
+
+    def put(self, decklist, deck):
+        deck_id = secrets.token_urlsafe(12)
+        with self._lock:
+            self._evict_expired()
+            self._decks[deck_id] = (self.clock() + self.ttl, decklist, deck)
+            while len(self._decks) > self.max_decks:
+                self._decks.popitem(last=False)
+        return deck_id
+
+    def get(self, deck_id, decklist=None):
+        """
+        Returns the stored deck, or None if the handle is unknown, expired,
+        or was built from a different decklist than the one given.
+        """
+        if not deck_id:
+            return None
+
+        with self._lock:
+            entry = self._decks.get(deck_id)
+            if entry is None:
+                return None
+
+            expires_at, stored_list, deck = entry
+            if expires_at <= self.clock():
+                del self._decks[deck_id]
+                return None
+            if decklist is not None and decklist != stored_list:
+                return None
+
+            # Sliding expiry: decks in use stay alive
+            self._decks[deck_id] = (self.clock() + self.ttl, stored_list, deck)
+            self._decks.move_to_end(deck_id)
+            return deck
+
+    def _evict_expired(self):
+        now = self.clock()
+        while self._decks:
+            deck_id, (expires_at, _, _) = next(iter(self._decks.items()))
+            if expires_at > now:
+                break
+            del self._decks[deck_id]
+
+
+_store = None
+
+
+def get_deck_store():
+    global _store
+    if _store is None:
+        _store = DeckStore()
+    return _store
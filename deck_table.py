@@ -0,0 +1,96 @@
+from collections import Counter
+
+from oracle_parser import pip_vector
+
+COLORS = ("W", "U", "B", "R", "G")
+
+# Type flags
+LAND = 1
+CREATURE = 2
+ARTIFACT = 4
+ENCHANTMENT = 8
+INSTANT = 16
+SORCERY = 32
+PLANESWALKER = 64
+BATTLE = 128
+
+TYPE_FLAGS = {
+    "land": LAND,
+    "creature": CREATURE,
+    "artifact": ARTIFACT,
+    "enchantment": ENCHANTMENT,
+    "instant": INSTANT,
+    "sorcery": SORCERY,
+    "planeswalker": PLANESWALKER,
+    "battle": BATTLE,
+}
+
+
+def type_flags(type_line):
+    """
+    Bitmask of card types on the front face ("Basic Land — Island" -> LAND).
+    """
+    front = type_line.split("//")[0].split("—")[0].lower()
+    flags = 0
+    for word in front.split():
+        flags |= TYPE_FLAGS.get(word, 0)
+    return flags
+
+
+class DeckTable:
+    """
+    Columnar, quantity-weighted view of a deck: one row per unique card,
+    with parallel columns so aggregations are a single flat scan.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.types = []
+        self.cmc = []
+        self.pips = []       # oracle_parser.pip_vector (colored slots first)
+        self.produced = []
+        self.quantity = []
+
+    @classmethod
+    def from_deck(cls, deck):
+        return cls.from_counts(Counter(deck.cards), deck.card_data)
+
+    @classmethod
+    def from_counts(cls, counts, card_data):
+        """
+        counts: { name: quantity } of any size (a deck, a cube, a pool);
+        card_data: { lowercase_name: card }.
+        """
+        table = cls()
+
+        for name, qty in counts.items():
+            card = card_data.get(name.lower())
+            if not card:
+                continue
+
+            cmc = card.get("cmc")
+
+            table.names.append(name)
+            table.types.append(type_flags(card.get("type_line", "")))
+            table.cmc.append(cmc if isinstance(cmc, (int, float)) else None)
+            table.pips.append(pip_vector(card.get("mana_cost", "")))
+            table.produced.append(tuple(card.get("produced_mana", [])))
+            table.quantity.append(qty)
+
+        return table
+
+    def __len__(self):
+        return len(self.names)
+
+    def rows(self):
+        """
+        Yields (name_id, types, cmc, pips, produced, quantity).
+        """
+        return zip(
+            range(len(self.names)),
+            self.types,
+            self.cmc,
+            self.pips,
+            self.produced,
+            self.quantity,
+        )
@@ -0,0 +1,103 @@
+"""
+Keep decisions looked up by hand signature instead of re-derived per hand.
+
+A mulligan decision only depends on how many lands a hand has, whether
+it has ramp and which colors it can make. Every card is reduced once
+per deck to an int code holding exactly that, so a hand's signature is
+a few integer ops away and each distinct signature is decided once.
+
+    code      = is_land << LAND_SHIFT | ramp << 5 | color_mask
+    signature = land_count << LAND_SHIFT | OR of (ramp | color_mask)
+"""
+
+from itertools import combinations
+
+COLOR_BITS = {"W": 1, "U": 2, "B": 4, "R": 8, "G": 16}
+RAMP_BIT = 1 << 5
+FEATURE_MASK = RAMP_BIT | 0b11111
+LAND_SHIFT = 6
+
+
+def color_mask(colors):
+    mask = 0
+    for c in colors:
+        mask |= COLOR_BITS.get(c, 0)
+    return mask
+
+
+def card_code(is_land, ramp, mask):
+    return (int(bool(is_land)) << LAND_SHIFT) | (RAMP_BIT if ramp else 0) | mask
+
+
+def hand_signature(codes):
+    lands = 0
+    bits = 0
+    for code in codes:
+        lands += code >> LAND_SHIFT
+        bits |= code
+    return (lands << LAND_SHIFT) | (bits & FEATURE_MASK)
+
+
+def unpack(signature):
+    """
+    signature -> (land_count, has_ramp, color_mask)
+    """
+    return signature >> LAND_SHIFT, bool(signature & RAMP_BIT), signature & 0b11111
+
+
+class HandTable:
+    """
+    Per-deck signature -> outcome table, filled lazily.
+
+    decide(land_count, has_ramp, color_mask) gives the outcome for a
+    signature; rank(outcome, land_count) orders outcomes (higher is
+    better) when choosing which cards to bottom after a London mulligan.
+    """
+
+    def __init__(self, codes, decide, rank=None):
+        self.codes = codes     # card name -> code
+        self.decide = decide
+        self.rank = rank or (lambda outcome, lands: (outcome, -abs(lands - 3)))
+        self._outcomes = {}
+        self._bottomed = {}
+
+    def outcome(self, signature):
+        result = self._outcomes.get(signature)
+        if result is None:
+            result = self._outcomes[signature] = self.decide(*unpack(signature))
+        return result
+
+    def hand_codes(self, hand):
+        codes = self.codes
+        return [codes[name] for name in hand]
+
+    def evaluate(self, hand):
+        """
+        Outcome for a hand of card names.
+        """
+        return self.outcome(hand_signature(self.hand_codes(hand)))
+
+    def best_after_bottom(self, codes, n_bottom):
+        """
+        London mulligan: best outcome from keeping len(codes) - n_bottom
+        of the drawn cards. Memoized on the hand's multiset of card codes,
+        which is all the choice depends on, so each distinct draw class is
+        searched once per deck rather than once per hand.
+        """
+        key = (tuple(sorted(codes)), n_bottom)
+        result = self._bottomed.get(key)
+        if result is not None:
+            return result
+
+        keep = len(codes) - n_bottom
+        best = None
+        best_rank = None
+        for kept in set(combinations(key[0], max(keep, 0))):
+            signature = hand_signature(kept)
+            outcome = self.outcome(signature)
+            rank = self.rank(outcome, signature >> LAND_SHIFT)
+            if best_rank is None or rank > best_rank:
+                best, best_rank = outcome, rank
+
+        self._bottomed[key] = best
+        return best
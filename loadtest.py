@@ -0,0 +1,227 @@
+"""
+Replays a corpus of decklists against the web app and reports throughput
+and latency percentiles per endpoint. Runs fully offline:
+
+    python loadtest.py --corpus decks/ --concurrency 8 --requests 200 \
+        --stub --latency-ms 80 --cold
+
+By default the Flask app runs in-process (WSGI test client, one per
+worker thread). Use --url to target an already running server instead.
+"""
+
+import os
+import sys
+import glob
+import time
+import tempfile
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+from urllib.error import HTTPError, URLError
+
+
+# ==================================================
+# Corpus
+# ==================================================
+
+def load_corpus(paths):
+    """
+    Each path is a decklist file or a directory of *.txt decklists.
+    """
+    decks = []
+    for path in paths:
+        files = (
+            sorted(glob.glob(os.path.join(path, "*.txt")))
+            if os.path.isdir(path) else [path]
+        )
+        for file in files:
+            with open(file, "r", encoding="utf-8") as f:
+                text = f.read().replace("\r\n", "\n").replace("\r", "\n")
+            if text.strip():
+                # parse_deck treats text without newlines as a file path
+                decks.append(text if text.endswith("\n") else text + "\n")
+    return decks
+
+
+# ==================================================
+# Stats
+# ==================================================
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(samples, wall_time):
+    """
+    samples: { endpoint: [(latency_seconds, ok), ...] }
+    """
+    report = {}
+    for endpoint, rows in sorted(samples.items()):
+        latencies = sorted(lat for lat, _ in rows)
+        errors = sum(1 for _, ok in rows if not ok)
+        report[endpoint] = {
+            "requests": len(rows),
+            "errors": errors,
+            "throughput_rps": round(len(rows) / wall_time, 2) if wall_time else 0.0,
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 1),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+            "max_ms": round(latencies[-1] * 1000, 1),
+        }
+    return report
+
+
+def print_report(report, wall_time, total):
+    print(f"\n{total} requests in {wall_time:.2f}s "
+          f"({total / wall_time:.2f} req/s overall)\n")
+    header = f"{'endpoint':<14}{'reqs':>7}{'errs':>6}{'rps':>9}" \
+             f"{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, r in report.items():
+        print(f"{endpoint:<14}{r['requests']:>7}{r['errors']:>6}"
+              f"{r['throughput_rps']:>9}{r['mean_ms']:>9}{r['p50_ms']:>9}"
+              f"{r['p95_ms']:>9}{r['p99_ms']:>9}{r['max_ms']:>9}")
+
+
+# ==================================================
+# Clients
+# ==================================================
+
+class InProcessClient:
+    """
+    Flask test client per thread: exercises the full WSGI stack without
+    a socket, so the numbers reflect app cost per worker.
+    """
+
+    def __init__(self):
+        from web import app
+        self.app = app
+        self.local = threading.local()
+
+    def post(self, path, form):
+        client = getattr(self.local, "client", None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        response = client.post(path, data=form)
+        return response.status_code
+
+
+class HttpClient:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def post(self, path, form):
+        req = Request(
+            self.base_url + path,
+            data=urlencode(form).encode("utf-8"),
+            method="POST",
+        )
+        try:
+            with urlopen(req, timeout=120) as resp:
+                resp.read()
+                return resp.status
+        except HTTPError as e:
+            return e.code
+        except URLError:
+            return 0
+
+
+# ==================================================
+# Runner
+# ==================================================
+
+def run(client, decks, endpoints, total_requests, concurrency):
+    samples = defaultdict(list)
+    lock = threading.Lock()
+
+    def one(i):
+        endpoint = endpoints[i % len(endpoints)]
+        deck = decks[(i // len(endpoints)) % len(decks)]
+
+        start = time.perf_counter()
+        try:
+            status = client.post(f"/{endpoint}", {"decklist": deck})
+        except Exception:
+            status = 0
+        elapsed = time.perf_counter() - start
+
+        with lock:
+            samples[endpoint].append((elapsed, status == 200))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total_requests)))
+    wall_time = time.perf_counter() - start
+
+    return samples, wall_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test web.py endpoints")
+    parser.add_argument("--corpus", nargs="+", default=["deck.txt"],
+                        help="decklist files or directories of *.txt decklists")
+    parser.add_argument("--endpoints", default="analyze,mulligans")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--url", default=None,
+                        help="target a running server instead of in-process")
+
+    stub = parser.add_argument_group("local Scryfall stand-in")
+    stub.add_argument("--stub", action="store_true",
+                      help="serve Scryfall from fixtures (in-process mode only)")
+    stub.add_argument("--fixtures", default="cache/scryfall")
+    stub.add_argument("--latency-ms", type=float, default=0.0)
+    stub.add_argument("--jitter-ms", type=float, default=0.0)
+    stub.add_argument("--error-rate", type=float, default=0.0)
+    stub.add_argument("--no-synthesize", action="store_true",
+                      help="do not invent placeholder cards for unknown names")
+    stub.add_argument("--cold", action="store_true",
+                      help="start from an empty card cache")
+    args = parser.parse_args()
+
+    decks = load_corpus(args.corpus)
+    if not decks:
+        sys.exit("No decklists found in corpus")
+
+    endpoints = [e.strip().strip("/") for e in args.endpoints.split(",") if e.strip()]
+
+    if args.url:
+        client = HttpClient(args.url)
+    else:
+        if args.stub:
+            from scryfall_stub import StubConfig, load_fixtures, serve_in_thread
+
+            config = StubConfig(
+                load_fixtures(args.fixtures),
+                latency_ms=args.latency_ms,
+                jitter_ms=args.jitter_ms,
+                error_rate=args.error_rate,
+                synthesize=not args.no_synthesize,
+            )
+            _, base_url = serve_in_thread(config)
+            # Must be set before web / scryfall are imported
+            os.environ["SCRYFALL_API"] = base_url
+            print(f"Scryfall stub on {base_url}")
+
+        if args.cold:
+            os.environ["SCRYFALL_CACHE_DIR"] = tempfile.mkdtemp(prefix="loadtest-cards-")
+
+        client = InProcessClient()
+
+    samples, wall_time = run(client, decks, endpoints, args.requests, args.concurrency)
+    print_report(summarize(samples, wall_time), wall_time, args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,42 @@
-from analysis import simulate_mulligans, simulate_early_game
+from profiling import stage
+from sim_store import get_store
 
+# Upper bound on iterations a single request may ask for
+MAX_ITERATIONS = 160_000
 
-def run_mulligan_simulation(deck, iterations=10_000):
+# "stratified" / "antithetic" reach the same precision with far fewer
+# iterations and also report standard errors (see stratified.py)
+SAMPLING_MODES = ("monte_carlo", "stratified", "antithetic")
+
+
+def run_mulligan_simulation(deck, iterations=10_000, seed=0, sampling="monte_carlo"):
     """
     Runs all mulligan-related simulations ONCE.
     This function is intentionally expensive and user-triggered.
+
+    Runs are seeded and stored per deck, so repeat visits are free and
+    asking for more iterations only simulates the extra ones.
     """
 
-    mulligans = simulate_mulligans(deck, iterations=iterations)
-    early_game = simulate_early_game(deck, iterations=iterations)
+    if sampling not in SAMPLING_MODES:
+        raise ValueError(f"Unknown sampling mode: {sampling}")
+    kind = "mulligans" if sampling == "monte_carlo" else f"mulligans_{sampling}"
+
+    store = get_store()
+    with stage(kind):
+        mulligans = store.run(deck, kind, iterations, seed=seed)
+    with stage("early_game"):
+        early_game = store.run(deck, "early_game", iterations, seed=seed)
 
     return {
-        "iterations": iterations,
+        # Whole blocks: at least what was asked for
+        "iterations": mulligans["iterations"],
+        "seed": seed,
+        "sampling": sampling,
         "mulligans": mulligans,
         "early_game": early_game,
         "note": (
-            "These results are based on Monte Carlo simulations. "
-            "Small variance is expected between runs."
+            "These results are based on seeded Monte Carlo simulations. "
+            "The same deck and seed always give the same numbers."
         )
     }
@@ -0,0 +1,182 @@
+import os
+import threading
+import unicodedata
+from collections import Counter
+
+from cache_io import read_json, update_json
+from card_record import iter_card_files
+
+# Stored next to the card files it was built from
+INDEX_FILE = "_name_index.json"
+
+# Fuzzy matches must be close AND clearly better than the runner-up
+FUZZY_THRESHOLD = 0.8
+FUZZY_MARGIN = 0.1
+MIN_FUZZY_LENGTH = 4
+
+_APOSTROPHES = str.maketrans({"’": "'", "‘": "'", "`": "'", "´": "'"})
+
+
+def normalize_name(name: str) -> str:
+    """
+    Spelling-insensitive key for a card name: strips accents, folds case,
+    unifies apostrophes and the spacing around "//".
+    """
+    text = unicodedata.normalize("NFKD", name)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.translate(_APOSTROPHES).casefold()
+
+    faces = [" ".join(face.split()) for face in text.split("//")]
+    return " // ".join(face for face in faces if face)
+
+
+def _trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """
+    Resolves decklist spellings to canonical card names (and oracle ids)
+    from every card we have cached, without touching the network.
+
+    Exact lookups use the normalized name (and each face of a
+    double-faced card); anything else falls back to trigram matching.
+    """
+
+    def __init__(self):
+        self.oracle_ids = {}   # canonical name -> oracle_id
+        self.exact = {}        # normalized key -> canonical name
+        self._names = []       # id -> canonical name
+        self._ids = {}         # canonical name -> id
+        self._postings = {}    # trigram -> set(ids)
+        self._sizes = []       # id -> trigram count
+        self._lock = threading.Lock()
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.oracle_ids)
+
+    def add(self, name: str, oracle_id=None):
+        with self._lock:
+            self._add(name, oracle_id)
+
+    def _add(self, name, oracle_id):
+        if name in self.oracle_ids and (oracle_id is None or self.oracle_ids[name] == oracle_id):
+            return
+
+        self.oracle_ids[name] = oracle_id
+        self.dirty = True
+
+        if name in self._ids:
+            return
+
+        card_id = len(self._names)
+        self._names.append(name)
+        self._ids[name] = card_id
+
+        # Full names win over a double-faced card's face alias
+        key = normalize_name(name)
+        self.exact[key] = name
+        for face in key.split(" // "):
+            self.exact.setdefault(face, name)
+
+        grams = _trigrams(key)
+        self._sizes.append(len(grams))
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(card_id)
+
+    def _fuzzy(self, key: str):
+        if len(key) < MIN_FUZZY_LENGTH:
+            return None
+
+        grams = _trigrams(key)
+        shared = Counter()
+        for gram in grams:
+            for card_id in self._postings.get(gram, ()):
+                shared[card_id] += 1
+
+        scored = sorted(
+            (
+                (2 * count / (len(grams) + self._sizes[card_id]), card_id)
+                for card_id, count in shared.items()
+            ),
+            reverse=True
+        )
+        if not scored:
+            return None
+
+        best_score, best_id = scored[0]
+        runner_up = scored[1][0] if len(scored) > 1 else 0.0
+
+        if best_score >= FUZZY_THRESHOLD and best_score - runner_up >= FUZZY_MARGIN:
+            return self._names[best_id]
+        return None
+
+    def resolve(self, name: str):
+        """
+        Returns the canonical card name for a decklist spelling, or None.
+        """
+        key = normalize_name(name)
+        return self.exact.get(key) or self._fuzzy(key)
+
+    def resolve_oracle_id(self, name: str):
+        canonical = self.resolve(name)
+        return self.oracle_ids.get(canonical) if canonical else None
+
+    # ======================
+    # Persistence
+    # ======================
+
+    def save(self, path):
+        """
+        Merges with names other workers saved, then adopts them.
+        """
+        with self._lock:
+            ours = dict(self.oracle_ids)
+            self.dirty = False
+
+        merged = update_json(path, lambda on_disk: {**on_disk, **ours})
+        for name, oracle_id in merged.items():
+            if name not in self.oracle_ids:
+                self.add(name, oracle_id)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path):
+        index = cls()
+        for name, oracle_id in read_json(path, {}).items():
+            index.add(name, oracle_id)
+        index.dirty = False
+        return index
+
+    @classmethod
+    def from_card_cache(cls, cache_dir):
+        """
+        One-time build from every card file already in the card cache.
+        """
+        index = cls()
+        for card in iter_card_files(cache_dir):
+            index.add(card.name, card.oracle_id)
+        return index
+
+
+_index = None
+
+
+def get_name_index(cache_dir):
+    global _index
+    if _index is None:
+        path = os.path.join(cache_dir, INDEX_FILE)
+        if os.path.exists(path):
+            _index = NameIndex.load(path)
+        else:
+            _index = NameIndex.from_card_cache(cache_dir)
+            if len(_index):
+                _index.save(path)
+    return _index
+
+
+def save_name_index(cache_dir):
+    if _index is not None and _index.dirty:
+        _index.save(os.path.join(cache_dir, INDEX_FILE))
@@ -0,0 +1,341 @@
+from collections import Counter
+from functools import lru_cache
+from math import comb
+
+from capabilities import extract_capabilities
+from card_record import iter_card_files
+from hypergeom import at_least
+from oracle_parser import pip_vector
+from scryfall import CACHE_DIR
+
+COLORS = ("W", "U", "B", "R", "G")
+
+DEFAULT_WEIGHTS = {
+    "keep_rate": 1.0,
+    "on_curve": 1.0,
+    "color_balance": 0.5,
+}
+
+MAX_CURVE_CMC = 6
+
+
+# ==================================================
+# Candidate pool (local card cache)
+# ==================================================
+
+def load_candidate_pool(color_identity, exclude=()):
+    """
+    Reads every cached Scryfall card that fits the color identity.
+    Returns { name: CardRecord }
+    """
+    allowed = set(color_identity)
+    excluded = {n.lower() for n in exclude}
+    pool = {}
+
+    for card in iter_card_files(CACHE_DIR):
+        name = card.name
+        if name.lower() in excluded:
+            continue
+        if not set(card.color_identity) <= allowed:
+            continue
+        if card.get("commander_legality", "legal") != "legal":
+            continue
+
+        pool[name] = card
+
+    return pool
+
+
+# ==================================================
+# Memoized math
+# ==================================================
+
+@lru_cache(maxsize=None)
+def keep_probability(deck_size, lands, ramp):
+    """
+    Exact probability that a 7-card hand is keepable by the land/ramp
+    rule in analysis._is_keepable (colors excluded): 2-5 lands, or one
+    land plus at least one ramp piece.
+    """
+    if deck_size < 7:
+        return 0.0
+
+    total = comb(deck_size, 7)
+    others = deck_size - lands
+
+    keep = sum(
+        comb(lands, k) * comb(others, 7 - k)
+        for k in range(2, 6)
+    )
+
+    # Exactly one land and at least one of the six others is ramp
+    keep += lands * (comb(others, 6) - comb(others - ramp, 6))
+
+    return keep / total
+
+
+@lru_cache(maxsize=None)
+def on_curve_probability(deck_size, sources, cmc):
+    """
+    Probability of holding `cmc` mana sources by turn `cmc` on the play.
+    """
+    return at_least(cmc, deck_size, sources, 6 + cmc)
+
+
+# ==================================================
+# Per-card contributions
+# ==================================================
+
+class CardContribution:
+    __slots__ = ("is_land", "is_ramp", "cmc", "pips", "sources", "key")
+
+    def __init__(self, caps, card):
+        self.is_land = "land" in caps.get("types", [])
+        self.is_ramp = not self.is_land and bool(caps.get("mana"))
+
+        cmc = card.get("cmc")
+        self.cmc = (
+            min(int(cmc), MAX_CURVE_CMC)
+            if isinstance(cmc, (int, float)) and not self.is_land and cmc >= 1
+            else 0
+        )
+
+        self.pips = pip_vector(card.get("mana_cost", ""))[:len(COLORS)]
+
+        produces = set()
+        if self.is_land:
+            for src in caps.get("mana", []):
+                produces.update(src.get("produces", []))
+        self.sources = tuple(1 if c in produces else 0 for c in COLORS)
+
+        # Cards with the same key are interchangeable for the objective
+        self.key = (self.is_land, self.is_ramp, self.cmc, self.pips, self.sources)
+
+
+class DeckState:
+    """
+    Aggregate totals the objective is computed from. A swap only moves
+    one card's contribution in and one out, so it is O(colors).
+    """
+
+    def __init__(self, deck_size, lands, ramp, pips, sources, curve):
+        self.deck_size = deck_size
+        self.lands = lands
+        self.ramp = ramp
+        self.pips = pips
+        self.sources = sources
+        self.curve = curve
+
+    @classmethod
+    def from_contributions(cls, contributions):
+        lands = ramp = 0
+        pips = [0] * len(COLORS)
+        sources = [0] * len(COLORS)
+        curve = Counter()
+
+        for contrib in contributions:
+            lands += contrib.is_land
+            ramp += contrib.is_ramp
+            for i in range(len(COLORS)):
+                pips[i] += contrib.pips[i]
+                sources[i] += contrib.sources[i]
+            if contrib.cmc:
+                curve[contrib.cmc] += 1
+
+        return cls(len(contributions), lands, ramp, tuple(pips), tuple(sources), curve)
+
+    def swapped(self, out, into):
+        curve = self.curve.copy()
+        if out.cmc:
+            curve[out.cmc] -= 1
+        if into.cmc:
+            curve[into.cmc] += 1
+
+        return DeckState(
+            self.deck_size,
+            self.lands - out.is_land + into.is_land,
+            self.ramp - out.is_ramp + into.is_ramp,
+            tuple(p - o + i for p, o, i in zip(self.pips, out.pips, into.pips)),
+            tuple(s - o + i for s, o, i in zip(self.sources, out.sources, into.sources)),
+            curve,
+        )
+
+
+# ==================================================
+# Objective
+# ==================================================
+
+def score_state(state, colors, weights=DEFAULT_WEIGHTS):
+    """
+    Returns (objective, metrics) for an aggregate deck state.
+    """
+    keep = keep_probability(state.deck_size, state.lands, state.ramp)
+
+    spells = sum(state.curve.values())
+    mana = state.lands + state.ramp
+    on_curve = (
+        sum(
+            count * on_curve_probability(state.deck_size, mana, cmc)
+            for cmc, count in state.curve.items()
+            if count
+        ) / spells
+        if spells else 0.0
+    )
+
+    # 1 - total variation distance between pip demand and land sources
+    idx = [COLORS.index(c) for c in colors if c in COLORS]
+    demand = sum(state.pips[i] for i in idx)
+    supply = sum(state.sources[i] for i in idx)
+    if demand and supply:
+        balance = 1 - 0.5 * sum(
+            abs(state.pips[i] / demand - state.sources[i] / supply)
+            for i in idx
+        )
+    else:
+        balance = 1.0
+
+    metrics = {
+        "keep_rate": keep,
+        "on_curve": on_curve,
+        "color_balance": balance,
+    }
+    objective = sum(weights.get(k, 0) * v for k, v in metrics.items())
+
+    return objective, metrics
+
+
+# ==================================================
+# Swap search
+# ==================================================
+
+class SwapOptimizer:
+    """
+    Proposes card swaps that maximize the consistency objective.
+
+    Per-card contributions are memoized by name and candidates are grouped
+    by contribution key, so each search step only scores one
+    representative per distinct (out, in) pair of profiles.
+    """
+
+    def __init__(self, deck, pool, weights=None):
+        self.deck = deck
+        self.pool = pool
+        self.weights = weights or DEFAULT_WEIGHTS
+        self.colors = [c for c in COLORS if c in deck.commander_colors]
+        self.commander_names = {c.get("name", "").lower() for c in deck.commanders}
+        self._contributions = {}
+        self.evaluations = 0
+
+    def contribution(self, name):
+        contrib = self._contributions.get(name)
+        if contrib is None:
+            if name in self.pool:
+                card = self.pool[name]
+                caps = extract_capabilities(card)
+            else:
+                card = self.deck.card_data.get(name.lower(), {})
+                caps = self.deck.card_capabilities.get(name) or extract_capabilities(card)
+            contrib = CardContribution(caps, card)
+            self._contributions[name] = contrib
+        return contrib
+
+    def _groups(self, names):
+        groups = {}
+        for name in sorted(names):
+            groups.setdefault(self.contribution(name).key, name)
+        return groups
+
+    def search(self, n_swaps=5, beam_width=1):
+        """
+        Beam search over swaps (beam_width=1 is plain hill climbing).
+        Returns the best swap sequence found with before/after metrics.
+        """
+        counts = Counter(self.deck.cards)
+        start = DeckState.from_contributions(
+            [self.contribution(name) for name in self.deck.cards]
+        )
+        start_score, start_metrics = score_state(start, self.colors, self.weights)
+
+        in_groups = self._groups(n for n in self.pool if n not in counts)
+
+        # beam entries: (score, state, counts, swaps)
+        beam = [(start_score, start, counts, [])]
+        best = beam[0]
+
+        for _ in range(n_swaps):
+            expanded = {}
+
+            for score, state, deck_counts, swaps in beam:
+                outs = self._groups(
+                    name for name, qty in deck_counts.items()
+                    if qty > 0 and name.lower() not in self.commander_names
+                )
+                added = {into for _, into, _ in swaps}
+
+                for out_name in outs.values():
+                    out = self.contribution(out_name)
+
+                    for into_name in in_groups.values():
+                        if into_name in added:
+                            continue
+                        into = self.contribution(into_name)
+                        if into.key == out.key:
+                            continue
+
+                        new_state = state.swapped(out, into)
+                        new_score, _ = score_state(new_state, self.colors, self.weights)
+                        self.evaluations += 1
+
+                        if new_score <= score:
+                            continue
+
+                        swap_set = frozenset(
+                            [(o, i) for o, i, _ in swaps] + [(out_name, into_name)]
+                        )
+                        if swap_set in expanded and expanded[swap_set][0] >= new_score:
+                            continue
+
+                        new_counts = deck_counts.copy()
+                        new_counts[out_name] -= 1
+                        new_counts[into_name] += 1
+                        expanded[swap_set] = (
+                            new_score,
+                            new_state,
+                            new_counts,
+                            swaps + [(out_name, into_name, new_score - score)],
+                        )
+
+            if not expanded:
+                break
+
+            beam = sorted(expanded.values(), key=lambda e: e[0], reverse=True)[:beam_width]
+            if beam[0][0] > best[0]:
+                best = beam[0]
+
+        best_score, best_state, _, best_swaps = best
+        _, best_metrics = score_state(best_state, self.colors, self.weights)
+
+        return {
+            "swaps": [
+                {"out": out, "in": into, "gain": round(gain, 4)}
+                for out, into, gain in best_swaps
+            ],
+            "before": {k: round(v, 4) for k, v in start_metrics.items()},
+            "after": {k: round(v, 4) for k, v in best_metrics.items()},
+            "objective_before": round(start_score, 4),
+            "objective_after": round(best_score, 4),
+            "evaluations": self.evaluations,
+        }
+
+
+def suggest_swaps(deck, n_swaps=5, beam_width=3, pool=None, weights=None):
+    """
+    Suggests up to `n_swaps` swaps drawn from the local card cache.
+    """
+    if pool is None:
+        pool = load_candidate_pool(
+            [c for c in COLORS if c in deck.commander_colors],
+            exclude=deck.cards
+        )
+
+    return SwapOptimizer(deck, pool, weights).search(n_swaps, beam_width)
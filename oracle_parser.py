@@ -1,6 +1,7 @@
 import re
 from dataclasses import dataclass
-from typing import Optional, List, Dict
+from functools import lru_cache
+from typing import Optional, List, Dict, Tuple
 
 
 @dataclass
@@ -32,17 +33,58 @@ def normalize(text: str) -> str:
 # MANA COST PARSER
 # -------------------------
 
-MANA_SYMBOL_RE = re.compile(r"\{([WUBRGC])\}")
+MANA_SYMBOL_RE = re.compile(r"\{([^{}]+)\}")
 
-def parse_mana_cost(mana_cost: str) -> Dict[str, int]:
+# Fixed-width pip vector layout. A colored slot counts every symbol that
+# can be paid with that color: strict pips, and each color of a hybrid
+# ({W/U}, {2/W}) or Phyrexian ({W/P}, {W/U/P}) symbol. The hybrid and
+# phyrexian slots count those symbols once more, so consumers can tell
+# flexible pips from strict ones.
+PIP_FIELDS = ("W", "U", "B", "R", "G", "C", "generic", "hybrid", "phyrexian", "X")
+W, U, B, R, G, C, GENERIC, HYBRID, PHYREXIAN, X = range(len(PIP_FIELDS))
+
+_SYMBOL_SLOTS = {"W": W, "U": U, "B": B, "R": R, "G": G, "C": C,
+                 "X": X, "Y": X, "Z": X, "S": GENERIC}
+
+EMPTY_PIPS = (0,) * len(PIP_FIELDS)
+
+
+@lru_cache(maxsize=None)
+def pip_vector(mana_cost: str) -> Tuple[int, ...]:
+    """
+    "{2}{W}{W/U}{U/P}" -> (2, 2, 0, 0, 0, 0, 2, 1, 1, 0)
+
+    Memoized by cost string: a whole card pool only has a few thousand
+    distinct costs. Both faces of a "//" cost are counted.
+    """
     if not mana_cost:
-        return {}
+        return EMPTY_PIPS
 
-    pips = {}
+    pips = [0] * len(PIP_FIELDS)
     for symbol in MANA_SYMBOL_RE.findall(mana_cost):
-        pips[symbol] = pips.get(symbol, 0) + 1
+        symbol = symbol.upper()
+
+        if symbol.isdigit():
+            pips[GENERIC] += int(symbol)
+        elif symbol in _SYMBOL_SLOTS:
+            pips[_SYMBOL_SLOTS[symbol]] += 1
+        elif "/" in symbol:
+            parts = symbol.split("/")
+            for part in parts:
+                if part in "WUBRG":
+                    pips[_SYMBOL_SLOTS[part]] += 1
+            pips[PHYREXIAN if "P" in parts else HYBRID] += 1
+        # anything else ({½}, {HW}, {∞}) carries no pip demand we model
+
+    return tuple(pips)
 
-    return pips
+
+def parse_mana_cost(mana_cost: str) -> Dict[str, int]:
+    """
+    { color_or_C: pips payable with it } for the non-zero slots.
+    """
+    pips = pip_vector(mana_cost or "")
+    return {symbol: pips[i] for i, symbol in enumerate(PIP_FIELDS[:C + 1]) if pips[i]}
 
 
 # -------------------------
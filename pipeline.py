@@ -0,0 +1,125 @@
+import asyncio
+
+from access_stats import record_deck
+from deck import Deck
+from deck_similarity import add_deck
+from deck_parser import parse_deck, parse_pool
+from scryfall import fetch_cards_bulk, fetch_cards_bulk_async
+from capability_cache import get_capability_cache
+from deck_store import get_deck_store
+from profiling import stage
+from sim_store import deck_hash, is_complete
+
+
+def build_deck(decklist):
+    """
+    decklist text -> Deck with capabilities and card data attached.
+    Raises RuntimeError if the commander cannot be found.
+    """
+    with stage("parse"):
+        flat_cards, unique_cards, commander_name = parse_deck(decklist)
+    with stage("fetch_cards"):
+        card_data_map = fetch_cards_bulk(unique_cards)
+    return _assemble_deck(flat_cards, unique_cards, commander_name, card_data_map)
+
+
+async def build_deck_async(decklist, client=None):
+    """
+    build_deck with the card fetch awaited on `client` (see asgi.py).
+    """
+    flat_cards, unique_cards, commander_name = parse_deck(decklist)
+    card_data_map = await fetch_cards_bulk_async(unique_cards, client)
+    return await asyncio.to_thread(
+        _assemble_deck, flat_cards, unique_cards, commander_name, card_data_map
+    )
+
+
+def _assemble_deck(flat_cards, unique_cards, commander_name, card_data_map):
+    commander_card = card_data_map.get(commander_name.lower())
+    if not commander_card:
+        raise RuntimeError(f"Commander not found: {commander_name}")
+
+    with stage("capabilities"):
+        capability_cache = get_capability_cache()
+        card_capabilities = {}
+        for name in unique_cards:
+            card_data = card_data_map.get(name.lower())
+            if card_data:
+                card_capabilities[name] = capability_cache.get_or_extract(card_data)
+        capability_cache.save()
+
+    deck = Deck(flat_cards, commander_card)
+    deck.card_capabilities = card_capabilities
+    deck.card_data = card_data_map
+    deck.unresolved = card_data_map.unresolved
+
+    return deck
+
+
+def build_pool(pool_text):
+    """
+    pool text (cube list, draft pool, 40-card deck) -> Deck without a
+    commander, holding only the cards that resolved.
+    """
+    with stage("parse"):
+        counts = parse_pool(pool_text)
+    with stage("fetch_cards"):
+        card_data_map = fetch_cards_bulk(list(counts))
+
+    with stage("capabilities"):
+        capability_cache = get_capability_cache()
+        card_capabilities = {}
+        for name in counts:
+            card_data = card_data_map.get(name.lower())
+            if card_data:
+                card_capabilities[name] = capability_cache.get_or_extract(card_data)
+        capability_cache.save()
+
+    resolved = {name: counts[name] for name in card_capabilities}
+    deck = Deck.from_counts(resolved, card_data_map, card_capabilities)
+    deck.unresolved = card_data_map.unresolved
+
+    return deck
+
+
+def _keep(decklist, deck):
+    """
+    Stores and indexes a freshly built deck; returns its deck_id. A deck
+    built while card fetches failed is neither, and gets no handle ("")
+    so the next request rebuilds it.
+    """
+    if not is_complete(deck):
+        return ""
+    add_deck(deck, deck_hash(deck))
+    return get_deck_store().put(decklist, deck)
+
+
+def load_deck(decklist, deck_id=""):
+    """
+    Reuses the deck behind a deck_id handle when it is still stored;
+    otherwise builds it from the decklist, stores it and counts it in
+    the access stats.
+    Returns (deck, deck_id).
+    """
+    store = get_deck_store()
+
+    deck = store.get(deck_id, decklist)
+    if deck is None:
+        deck = build_deck(decklist)
+        deck_id = _keep(decklist, deck)
+        record_deck(deck, decklist, deck_hash(deck))
+
+    return deck, deck_id
+
+
+async def load_deck_async(decklist, deck_id="", client=None):
+    store = get_deck_store()
+
+    deck = store.get(deck_id, decklist)
+    if deck is None:
+        deck = await build_deck_async(decklist, client)
+        deck_id = _keep(decklist, deck)
+        # May flush the stats file: keep that file I/O off the event loop
+        await asyncio.to_thread(record_deck, deck, decklist, deck_hash(deck))
+
+    return deck, deck_id
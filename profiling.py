@@ -0,0 +1,294 @@
+"""
+On-demand profiling of single requests, for admins only.
+
+With PROFILE_TOKEN set, a request to a @profiled route that carries the
+token (X-Profile header or ?profile= query flag) runs under a profiler:
+
+    X-Profile-Mode: deterministic   cProfile, downloadable as .pstats
+    X-Profile-Mode: sampling        stack sampler, downloadable as .folded
+                                    (collapsed stacks for flamegraph.pl /
+                                    speedscope)
+
+The response carries X-Profile-Id. The last MAX_PROFILES profiles are
+kept under cache/profiles with the deck hash and per-stage timings:
+
+    GET /admin/profiles                  (X-Profile: <token>)
+    GET /admin/profiles/<id>.pstats
+    GET /admin/profiles/<id>.folded
+
+Without PROFILE_TOKEN, or without the token on the request, the route
+runs as usual; stage() is then a single context variable lookup.
+"""
+
+import os
+import sys
+import hmac
+import json
+import time
+import secrets
+import cProfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from flask import Blueprint, Response, abort, make_response, request, send_file
+
+from cache_io import atomic_write, read_json
+
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+PROFILE_DIR = "cache/profiles"
+MAX_PROFILES = 20
+
+PROFILE_MODES = ("deterministic", "sampling")
+SAMPLE_INTERVAL = 0.001
+
+admin = Blueprint("admin", __name__, url_prefix="/admin")
+
+# cProfile allows one active profiler per process
+_profiler_lock = threading.Lock()
+
+
+# ==================================================
+# Stage timings
+# ==================================================
+
+_stages = ContextVar("profile_stages", default=None)
+
+
+@contextmanager
+def stage(name):
+    """
+    Times a block into the profiled request's stage timings; a no-op for
+    every other request.
+    """
+    timings = _stages.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+# ==================================================
+# Sampling profiler
+# ==================================================
+
+class StackSampler:
+    """
+    Samples one thread's Python stack every `interval` seconds into
+    collapsed-stack counts. The sampler needs the GIL to take a sample,
+    so CPU-bound code is sampled about once per switch interval (5ms).
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def folded(self):
+        return "".join(f"{stack} {n}\n" for stack, n in self.counts.most_common())
+
+
+# ==================================================
+# Storage (ring buffer on disk, shared by workers)
+# ==================================================
+
+def _path(profile_id, ext):
+    return os.path.join(PROFILE_DIR, f"{profile_id}.{ext}")
+
+
+def _prune():
+    metas = sorted(
+        (entry.stat().st_mtime, entry.name[:-len(".json")])
+        for entry in os.scandir(PROFILE_DIR)
+        if entry.name.endswith(".json")
+    )
+    for _, profile_id in metas[:max(len(metas) - MAX_PROFILES, 0)]:
+        for ext in ("json", "pstats", "folded"):
+            try:
+                os.remove(_path(profile_id, ext))
+            except OSError:
+                pass
+
+
+def _save(meta, pstats_profiler=None, folded=None):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profile_id = meta["id"]
+
+    if pstats_profiler is not None:
+        pstats_profiler.dump_stats(_path(profile_id, "pstats"))
+    if folded is not None:
+        atomic_write(_path(profile_id, "folded"), folded)
+
+    # Metadata last: a profile is listed only once its data is on disk
+    atomic_write(_path(profile_id, "json"), json.dumps(meta))
+    _prune()
+
+
+def list_profiles():
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    metas = [
+        read_json(os.path.join(PROFILE_DIR, name), None)
+        for name in os.listdir(PROFILE_DIR)
+        if name.endswith(".json")
+    ]
+    return sorted((m for m in metas if m), key=lambda m: m["created"], reverse=True)
+
+
+# ==================================================
+# Request profiling
+# ==================================================
+
+def _authorized():
+    if not PROFILE_TOKEN:
+        return False
+    token = request.headers.get("X-Profile") or request.args.get("profile") or ""
+    return hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode())
+
+
+def _requested_mode():
+    if not _authorized():
+        return None
+    mode = request.headers.get("X-Profile-Mode") or request.args.get("profile_mode") or "deterministic"
+    return mode if mode in PROFILE_MODES else None
+
+
+def _deck_hash():
+    from deck_parser import parse_deck
+    from sim_store import cards_hash
+
+    decklist = request.form.get("decklist") or (request.get_json(silent=True) or {}).get("decklist") or ""
+    if "\n" not in decklist:
+        decklist += "\n"
+    flat_cards, _, commander_name = parse_deck(decklist)
+    return cards_hash(commander_name, flat_cards) if commander_name else None
+
+
+def profiled(route):
+    """
+    Lets an admin profile one request to this view (see module docstring).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            mode = _requested_mode()
+            if mode is None:
+                return view(*args, **kwargs)
+
+            if not _profiler_lock.acquire(blocking=False):
+                # Another request is being profiled: serve this one as usual
+                return _tag(view(*args, **kwargs), status="busy")
+
+            try:
+                return _run_profiled(route, mode, view, args, kwargs)
+            finally:
+                _profiler_lock.release()
+        return wrapper
+    return decorator
+
+
+def _tag(response, **headers):
+    response = make_response(response)
+    for key, value in headers.items():
+        response.headers[f"X-Profile-{key.title()}"] = value
+    return response
+
+
+def _run_profiled(route, mode, view, args, kwargs):
+    timings = {}
+    token = _stages.set(timings)
+    profiler = sampler = None
+
+    if mode == "sampling":
+        sampler = StackSampler(threading.get_ident())
+        sampler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    start = time.perf_counter()
+    try:
+        response = view(*args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+        if sampler is not None:
+            sampler.stop()
+        _stages.reset(token)
+
+    meta = {
+        "id": secrets.token_hex(8),
+        "route": route,
+        "mode": mode,
+        "created": time.time(),
+        "deck_hash": _deck_hash(),
+        "total_ms": round(elapsed * 1000, 1),
+        "stages_ms": {name: round(t * 1000, 1) for name, t in timings.items()},
+        "formats": ["pstats"] if profiler is not None else ["folded"],
+    }
+    _save(meta, pstats_profiler=profiler, folded=sampler.folded() if sampler else None)
+
+    return _tag(response, id=meta["id"])
+
+
+# ==================================================
+# Downloads
+# ==================================================
+
+@admin.before_request
+def _require_token():
+    if not _authorized():
+        abort(404)
+
+
+@admin.route("/profiles")
+def profiles():
+    return {"profiles": list_profiles()}
+
+
+@admin.route("/profiles/<profile_id>.<fmt>")
+def download(profile_id, fmt):
+    if fmt not in ("pstats", "folded", "json") or not profile_id.isalnum():
+        abort(404)
+
+    path = _path(profile_id, fmt)
+    if not os.path.exists(path):
+        abort(404)
+
+    if fmt == "folded":
+        with open(path, "r", encoding="utf-8") as f:
+            return Response(f.read(), mimetype="text/plain")
+    return send_file(
+        os.path.abspath(path),
+        mimetype="application/octet-stream" if fmt == "pstats" else "application/json",
+        as_attachment=True,
+        download_name=f"{profile_id}.{fmt}",
+    )
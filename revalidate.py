@@ -0,0 +1,275 @@
+"""
+Background revalidation of the local card cache.
+
+Cached cards are served for as long as they exist (stale-while-revalidate);
+a card file's ctime is when it was last fetched or confirmed current, and
+its mtime when its content last changed (which is what the card index
+watches). Files confirmed more than MAX_AGE ago are re-requested from
+Scryfall in rate-limited collection batches, oldest first, off the
+request path:
+
+    python revalidate.py [--max-age-days 7] [--limit 750]
+
+Unchanged cards only have their ctime bumped. Changed cards are
+rewritten, and their capabilities are re-extracted only if a field the
+extractor reads changed. Run it from cron, or set SCRYFALL_REVALIDATE=1
+to have each web process run a Revalidator thread; a lock file makes
+sure only one of them works at a time.
+"""
+
+import os
+import time
+import argparse
+import threading
+
+import requests
+
+import card_store
+from cache_io import try_file_lock
+from capabilities import extract_capabilities
+from capability_cache import get_capability_cache
+from card_record import CardRecord, RECORD_EXT, read_card_file, write_card_file
+from name_index import get_name_index, save_name_index
+from scryfall import (
+    CACHE_DIR, MAX_BATCH, SCRYFALL_COLLECTION_API, _cache_path, _chunks, bump_card_data_generation
+)
+
+MAX_AGE = float(os.environ.get("SCRYFALL_MAX_AGE_DAYS", 7)) * 24 * 60 * 60
+ENABLED = os.environ.get("SCRYFALL_REVALIDATE", "0") == "1"
+
+# Scryfall asks for 50-100ms between requests
+BATCH_DELAY = 0.1
+MAX_PER_CYCLE = 750
+POLL_INTERVAL = 5 * 60
+
+LOCK_PATH = os.path.join(CACHE_DIR, "_revalidate")
+
+# The card fields extract_capabilities reads
+CAPABILITY_FIELDS = ("oracle_text", "type_line", "mana_cost", "cmc", "produced_mana")
+
+
+class ScryfallUnavailable(Exception):
+    pass
+
+
+def stale_files(cache_dir=CACHE_DIR, max_age=MAX_AGE, limit=MAX_PER_CYCLE):
+    """
+    Card files last fetched or confirmed more than max_age seconds ago,
+    oldest first.
+    """
+    if not os.path.isdir(cache_dir):
+        return []
+
+    cutoff = time.time() - max_age
+    stale = []
+    with os.scandir(cache_dir) as entries:
+        for entry in entries:
+            if entry.name.startswith(("_", ".")) or not entry.name.endswith(RECORD_EXT):
+                continue
+            confirmed = entry.stat().st_ctime
+            if confirmed < cutoff:
+                stale.append((confirmed, entry.path))
+
+    stale.sort()
+    return [path for _, path in stale[:limit]]
+
+
+def _identifier(record):
+    # oracle_id survives renames; very old records may not have one
+    if record.oracle_id:
+        return {"oracle_id": record.oracle_id}
+    return {"name": record.name}
+
+
+def _fetch(records):
+    """
+    { oracle_id or lowercase name: fresh CardRecord } for one batch, or
+    None if Scryfall rejected the batch.
+    """
+    try:
+        response = requests.post(
+            SCRYFALL_COLLECTION_API,
+            json={"identifiers": [_identifier(r) for r in records]},
+            timeout=15
+        )
+    except requests.RequestException as e:
+        raise ScryfallUnavailable(str(e))
+
+    if response.status_code == 429 or response.status_code >= 500:
+        raise ScryfallUnavailable(f"HTTP {response.status_code}")
+    if response.status_code != 200:
+        return None
+
+    fresh = {}
+    for card in response.json().get("data", []):
+        record = CardRecord.from_scryfall(card)
+        fresh[record.name.lower()] = record
+        if record.oracle_id:
+            fresh[record.oracle_id] = record
+    return fresh
+
+
+def _touch(path):
+    # Rewriting the same times bumps only ctime: the file counts as
+    # confirmed, while its mtime (content changed) stays put for the
+    # card index
+    try:
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    except OSError:
+        pass
+
+
+def _replace(path, new):
+    new_path = _cache_path(new.name)
+    write_card_file(new_path, new)
+    if new_path != path:
+        # Renamed card: the old spelling still resolves through the name index
+        os.remove(path)
+        get_name_index(CACHE_DIR).add(new.name, new.oracle_id)
+        return True
+    return False
+
+
+def revalidate(paths, delay=BATCH_DELAY):
+    """
+    Refreshes the given card files from Scryfall. Returns counts of cards
+    checked, changed and with recomputed capabilities, plus batches that
+    failed. Stops early (keeping what was done) if Scryfall is unavailable.
+    """
+    stats = {"checked": 0, "changed": 0, "recomputed": 0, "failed": 0}
+
+    cached = []
+    for path in paths:
+        try:
+            record = read_card_file(path)
+        except (OSError, ValueError, EOFError, TypeError):
+            continue
+        if record.name:
+            cached.append((path, record))
+
+    capability_cache = get_capability_cache()
+    renamed = False
+
+    for i, batch in enumerate(_chunks(cached, MAX_BATCH)):
+        if i:
+            time.sleep(delay)
+
+        try:
+            fresh = _fetch([record for _, record in batch])
+        except ScryfallUnavailable as e:
+            print(f"⚠️ Revalidation paused, Scryfall unavailable: {e}")
+            stats["failed"] += 1
+            break
+
+        if fresh is None:
+            # Rejected batch: don't let it block the queue, retry next cycle
+            stats["failed"] += 1
+            for path, _ in batch:
+                _touch(path)
+            continue
+
+        for path, old in batch:
+            stats["checked"] += 1
+            new = fresh.get(old.oracle_id) or fresh.get(old.name.lower())
+
+            # Not found (or unchanged): keep serving what we have
+            if new is None or new == old:
+                _touch(path)
+                continue
+
+            renamed |= _replace(path, new)
+            stats["changed"] += 1
+
+            if new.oracle_id and any(old.get(f) != new.get(f) for f in CAPABILITY_FIELDS):
+                capability_cache.set(new.oracle_id, extract_capabilities(new))
+                stats["recomputed"] += 1
+
+    capability_cache.save()
+    if renamed:
+        save_name_index(CACHE_DIR)
+    if stats["changed"]:
+        # Responses built from the old data (API ETags) are now outdated
+        bump_card_data_generation()
+
+    # The shared tables are a snapshot of the cache: repack them so other
+    # processes remap the fresh data
+    if stats["changed"] and os.path.exists(os.path.join(card_store.STORE_DIR, card_store.CARDS_FILE)):
+        card_store.build()
+
+    return stats
+
+
+def run_once(max_age=MAX_AGE, limit=MAX_PER_CYCLE, cache_dir=CACHE_DIR):
+    """
+    One revalidation pass. Returns None if another process is already
+    running one.
+    """
+    with try_file_lock(LOCK_PATH) as acquired:
+        if not acquired:
+            return None
+        return revalidate(stale_files(cache_dir, max_age, limit))
+
+
+# ==================================================
+# Background worker
+# ==================================================
+
+class Revalidator(threading.Thread):
+    def __init__(self, interval=POLL_INTERVAL, max_age=MAX_AGE, limit=MAX_PER_CYCLE):
+        super().__init__(name="revalidator", daemon=True)
+        self.interval = interval
+        self.max_age = max_age
+        self.limit = limit
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                stats = run_once(self.max_age, self.limit)
+            except Exception as e:
+                print(f"⚠️ Revalidation failed: {e}")
+                continue
+            if stats and stats["changed"]:
+                print(f"🔄 Revalidated {stats['checked']} cards, {stats['changed']} changed")
+
+    def stop(self):
+        self.stopped.set()
+
+
+_revalidator = None
+_revalidator_pid = None
+_revalidator_lock = threading.Lock()
+
+
+def ensure_revalidator():
+    """
+    Starts this process's revalidator thread if it is not running
+    (threads do not survive a fork, hence the pid check).
+    """
+    global _revalidator, _revalidator_pid
+    with _revalidator_lock:
+        if _revalidator is not None and _revalidator_pid == os.getpid() and _revalidator.is_alive():
+            return _revalidator
+        _revalidator = Revalidator()
+        _revalidator_pid = os.getpid()
+        _revalidator.start()
+        return _revalidator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh stale cached cards from Scryfall")
+    parser.add_argument("--max-age-days", type=float, default=MAX_AGE / (24 * 60 * 60))
+    parser.add_argument("--limit", type=int, default=MAX_PER_CYCLE)
+    args = parser.parse_args()
+
+    stats = run_once(args.max_age_days * 24 * 60 * 60, args.limit)
+    if stats is None:
+        print("Another revalidation is already running")
+    else:
+        print(f"Checked {stats['checked']} cards: {stats['changed']} changed, "
+              f"{stats['recomputed']} capabilities recomputed, {stats['failed']} failed batches")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,78 @@
 import os
-import json
+import time
+import asyncio
 import requests
+from dataclasses import dataclass
+from concurrent.futures import TimeoutError as FutureTimeout
 from itertools import islice
 
-SCRYFALL_COLLECTION_API = "https://api.scryfall.com/cards/collection"
-CACHE_DIR = "cache/scryfall"
+from cache_io import quarantine, read_json, remove_stale_temp_files, update_json
+from card_record import CardRecord, RECORD_EXT, read_card_file, write_card_file
+from card_store import shared_cards
+from name_index import get_name_index, normalize_name, save_name_index
+from singleflight import SingleFlight
+
+# httpx is optional: it lets the async serving mode (asgi.py) await
+# fetches on a shared client instead of tying up a thread per fetch
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# Overridable so load tests can point at a local stand-in (scryfall_stub.py)
+SCRYFALL_API = os.environ.get("SCRYFALL_API", "https://api.scryfall.com")
+SCRYFALL_COLLECTION_API = f"{SCRYFALL_API}/cards/collection"
+CACHE_DIR = os.environ.get("SCRYFALL_CACHE_DIR", "cache/scryfall")
 MAX_BATCH = 75
 
+# Names Scryfall reported as not found are not retried until this expires
+NEGATIVE_CACHE_PATH = os.path.join(CACHE_DIR, "_not_found.json")
+NEGATIVE_TTL = 24 * 60 * 60
+
+# How long a request waits on a fetch another request already started
+IN_FLIGHT_TIMEOUT = 60
+
+# Bumped whenever cached card data is replaced (see revalidate.py)
+GENERATION_PATH = os.path.join(CACHE_DIR, "_generation.json")
+
+_in_flight = SingleFlight()
+_recovered = False
+
 
-def _cache_path(name: str) -> str:
+def _cache_path(name: str, ext: str = RECORD_EXT) -> str:
     safe = name.replace("/", "_").strip()
-    return os.path.join(CACHE_DIR, f"{safe}.json")
+    return os.path.join(CACHE_DIR, f"{safe}{ext}")
+
+
+def _load_cached(name: str):
+    """
+    Returns the cached CardRecord for a canonical name, or None.
+    The shared (mmapped) store is checked first; legacy full-JSON cache
+    files are projected and rewritten in place.
+    """
+    store = shared_cards()
+    if store is not None:
+        record = store.get(name)
+        if record is not None:
+            return record
+
+    path = _cache_path(name)
+    if os.path.exists(path):
+        try:
+            return read_card_file(path)
+        except (ValueError, EOFError, TypeError):
+            # Older record format or a damaged file: set it aside, refetch
+            quarantine(path)
+            return None
+
+    legacy = _cache_path(name, ".json")
+    if os.path.exists(legacy):
+        record = read_card_file(legacy)
+        write_card_file(path, record)
+        os.remove(legacy)
+        return record
+
+    return None
 
 
 def _chunks(iterable, size):
@@ -22,59 +84,292 @@ def _chunks(iterable, size):
         yield chunk
 
 
-def fetch_cards_bulk(names: list[str]) -> dict:
+@dataclass
+class Unresolved:
+    name: str
+    reason: str  # "not_found" | "rejected" | "cached_not_found" | "request_failed"
+    detail: str = ""
+
+
+class CardLookup(dict):
     """
-    Fetch multiple cards using Scryfall's collection endpoint.
-    Safe for Commander decks (handles >75 cards and bad names).
-    Returns { lowercase_name: card_json }
+    { lowercase_name: CardRecord } plus the names that could not be resolved.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.unresolved: list[Unresolved] = []
+
+
+# ==================================================
+# Card data generation
+# ==================================================
+
+def card_data_generation() -> int:
+    """
+    Version of the cached card data: changes when cards already served
+    are rewritten, so anything derived from them can be invalidated.
+    """
+    return read_json(GENERATION_PATH, {}).get("generation", 0)
+
+
+def bump_card_data_generation():
+    update_json(GENERATION_PATH, lambda on_disk: {"generation": on_disk.get("generation", 0) + 1})
+
+
+# ==================================================
+# Negative cache
+# ==================================================
+
+def _fresh(entries: dict) -> dict:
+    now = time.time()
+    return {
+        name: ts for name, ts in entries.items()
+        if now - ts < NEGATIVE_TTL
+    }
+
+
+def _load_negative_cache() -> dict:
+    return _fresh(read_json(NEGATIVE_CACHE_PATH, {}))
+
+
+def _save_negative_cache(entries: dict):
+    # Merge with what other workers recorded since we loaded
+    update_json(NEGATIVE_CACHE_PATH, lambda on_disk: _fresh({**on_disk, **entries}))
+
+
+# ==================================================
+# Fetching
+# ==================================================
+
+def _store_card(card: dict, results: CardLookup):
+    # Project at ingest: only the fields the analyzers read are kept
+    record = CardRecord.from_scryfall(card)
+    write_card_file(_cache_path(record.name), record)
+
+    results[record.name.lower()] = record
+    get_name_index(CACHE_DIR).add(record.name, record.oracle_id)
+
+
+def _payload(batch: list[str]) -> dict:
+    return {
+        "identifiers": [{"name": n} for n in batch]
+    }
+
+
+def _request_failed(batch: list[str], results: CardLookup, detail: str):
+    for name in batch:
+        results.unresolved.append(Unresolved(name, "request_failed", detail))
+
+
+def _fetch_batch(batch: list[str], results: CardLookup, negative: dict):
+    """
+    Fetches one batch. A batch Scryfall rejects as a bad request is
+    bisected so the good names in it still resolve; transient failures
+    (network errors, 429, 5xx) are reported without retrying.
+    """
+    try:
+        response = requests.post(
+            SCRYFALL_COLLECTION_API,
+            json=_payload(batch),
+            timeout=15
+        )
+    except requests.RequestException as e:
+        _request_failed(batch, results, str(e))
+        return
+
+    for half in _apply_response(batch, response, results, negative):
+        _fetch_batch(half, results, negative)
+
+
+async def _fetch_batch_async(client, batch: list[str], results: CardLookup, negative: dict):
+    try:
+        response = await client.post(SCRYFALL_COLLECTION_API, json=_payload(batch), timeout=15)
+    except httpx.HTTPError as e:
+        _request_failed(batch, results, str(e))
+        return
+
+    for half in _apply_response(batch, response, results, negative):
+        await _fetch_batch_async(client, half, results, negative)
+
+
+def _apply_response(batch: list[str], response, results: CardLookup, negative: dict):
     """
+    Records one batch response (requests or httpx). Returns the halves to
+    fetch again when a bad request is bisected.
+    """
+    if response.status_code == 200:
+        body = response.json()
+
+        for card in body.get("data", []):
+            _store_card(card, results)
+
+        now = time.time()
+        for ident in body.get("not_found", []):
+            name = ident.get("name", "")
+            negative[name.lower()] = now
+            results.unresolved.append(Unresolved(name, "not_found"))
+        return []
 
+    detail = f"HTTP {response.status_code}"
+    bad_request = 400 <= response.status_code < 500 and response.status_code != 429
+
+    if bad_request and len(batch) > 1:
+        mid = len(batch) // 2
+        return [batch[:mid], batch[mid:]]
+
+    if bad_request:
+        # Bisected down to the one name Scryfall refuses
+        negative[batch[0].lower()] = time.time()
+        results.unresolved.append(Unresolved(batch[0], "rejected", detail))
+        return []
+
+    _request_failed(batch, results, detail)
+    return []
+
+
+def _lookup_cached(names: list[str]):
+    """
+    Resolves what the local cache can.
+    Returns (results, negative, missing).
+    """
+    global _recovered
     os.makedirs(CACHE_DIR, exist_ok=True)
+    if not _recovered:
+        remove_stale_temp_files(CACHE_DIR)
+        _recovered = True
 
-    results = {}
+    index = get_name_index(CACHE_DIR)
+    results = CardLookup()
     missing = []
+    negative = _load_negative_cache()
 
-    # 1️⃣ Load cached cards
+    # 1️⃣ Load cached cards (and skip names known not to exist)
     for name in names:
         clean = name.strip()
-        path = _cache_path(clean)
+        canonical = index.resolve(clean) or clean
+        card = _load_cached(canonical)
 
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                results[clean.lower()] = json.load(f)
+        if card is not None:
+            results[clean.lower()] = card
+            results[card.name.lower()] = card
+        elif clean.lower() in negative:
+            results.unresolved.append(Unresolved(clean, "cached_not_found"))
         else:
             missing.append(clean)
 
+    return results, negative, missing
+
+
+def _claim(missing: list[str]):
+    """
+    2️⃣ Only one fetch per card name is in flight across threads: returns
+    (owned, waiting), the names this caller must fetch (and release) and
+    futures for names another request is already fetching.
+    """
     if not missing:
-        return results
+        return [], {}
+    return _in_flight.claim(dict.fromkeys(missing), key=normalize_name)
 
-    # 2️⃣ Fetch missing cards in safe batches
-    for batch in _chunks(missing, MAX_BATCH):
-        payload = {
-            "identifiers": [{"name": n} for n in batch]
-        }
 
-        response = requests.post(
-            SCRYFALL_COLLECTION_API,
-            json=payload,
-            timeout=15
-        )
+def _record_fetched(owned, results: CardLookup, negative: dict, known_missing: int):
+    if len(negative) != known_missing:
+        _save_negative_cache(negative)
+
+    # 3️⃣ Map decklist spellings onto what Scryfall returned
+    index = get_name_index(CACHE_DIR)
+    for name in owned:
+        canonical = index.resolve(name)
+        if canonical and canonical.lower() in results:
+            results.setdefault(name.lower(), results[canonical.lower()])
+
+    save_name_index(CACHE_DIR)
 
-        # Handle bad batch gracefully
-        if response.status_code != 200:
-            print("⚠️ Scryfall batch failed:")
-            print(response.text)
-            continue
 
-        data = response.json().get("data", [])
+def _release(owned, results: CardLookup):
+    problems = {u.name: u for u in results.unresolved}
+    _in_flight.release(
+        owned,
+        lambda name: (
+            results.get(name.lower()),
+            problems.get(name, Unresolved(name, "request_failed", "fetch aborted")),
+        ),
+        key=normalize_name
+    )
+
+
+def _add_waited(results: CardLookup, name: str, card, problem: Unresolved):
+    if card is not None:
+        results[name.lower()] = card
+        results[card.name.lower()] = card
+    else:
+        results.unresolved.append(Unresolved(name, problem.reason, problem.detail))
+
+
+def fetch_cards_bulk(names: list[str]) -> CardLookup:
+    """
+    Fetch multiple cards using Scryfall's collection endpoint.
+    Safe for Commander decks (handles >75 cards and bad names).
+    Returns { lowercase_name: CardRecord } with `.unresolved` listing the
+    names that could not be resolved and why.
+
+    Decklist spellings are resolved to canonical names through the local
+    name index first, so "sol ring", "Sol Ring" and "Fire//Ice" all hit
+    the same cache file. Results are keyed by both spellings.
+    """
+    results, negative, missing = _lookup_cached(names)
+    owned, waiting = _claim(missing)
+
+    try:
+        known_missing = len(negative)
+        for batch in _chunks(owned, MAX_BATCH):
+            _fetch_batch(batch, results, negative)
+        if owned:
+            _record_fetched(owned, results, negative, known_missing)
+    finally:
+        _release(owned, results)
+
+    for name, future in waiting.items():
+        try:
+            card, problem = future.result(timeout=IN_FLIGHT_TIMEOUT)
+        except FutureTimeout:
+            card, problem = None, Unresolved(name, "request_failed", "timed out waiting for fetch")
+        _add_waited(results, name, card, problem)
+
+    return results
+
+
+async def fetch_cards_bulk_async(names: list[str], client=None) -> CardLookup:
+    """
+    fetch_cards_bulk for the async serving mode: Scryfall requests are
+    awaited on `client` (a shared httpx.AsyncClient) and cache file I/O
+    runs in a thread. Without httpx or a client, the sync version runs in
+    a thread instead.
+    """
+    if httpx is None or client is None:
+        return await asyncio.to_thread(fetch_cards_bulk, names)
 
-        for card in data:
-            name = card["name"]
-            path = _cache_path(name)
+    results, negative, missing = await asyncio.to_thread(_lookup_cached, names)
+    # Claimed on the event loop, right before the try that releases it
+    owned, waiting = _claim(missing)
 
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(card, f, indent=2)
+    try:
+        known_missing = len(negative)
+        for batch in _chunks(owned, MAX_BATCH):
+            await _fetch_batch_async(client, batch, results, negative)
+        if owned:
+            await asyncio.to_thread(_record_fetched, owned, results, negative, known_missing)
+    finally:
+        _release(owned, results)
 
-            results[name.lower()] = card
+    for name, future in waiting.items():
+        try:
+            # Shielded: timing out here must not cancel the other fetch
+            card, problem = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)), IN_FLIGHT_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            card, problem = None, Unresolved(name, "request_failed", "timed out waiting for fetch")
+        _add_waited(results, name, card, problem)
 
     return results
@@ -0,0 +1,256 @@
+"""
+Local stand-in for the Scryfall endpoints this app uses:
+
+    POST /cards/collection
+    GET  /cards/named?exact=...  (or ?fuzzy=...)
+
+Cards are served from fixture JSON files (by default the local card
+cache), with configurable latency and error injection.
+
+    python scryfall_stub.py --port 8765 --latency-ms 80 --error-rate 0.02
+    SCRYFALL_API=http://127.0.0.1:8765 python web.py
+"""
+
+import os
+import json
+import hashlib
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from card_record import RECORD_EXT, read_card_file
+
+MAX_BATCH = 75
+
+
+# ==================================================
+# Fixtures
+# ==================================================
+
+def load_fixtures(fixture_dir):
+    """
+    Loads every card in fixture_dir: full Scryfall *.json files are served
+    as-is, slim *.card records from the app's cache as plain dicts.
+    Returns { lowercase_name: card_json } (double-faced cards are also
+    indexed by each face name).
+    """
+    cards = {}
+    if not os.path.isdir(fixture_dir):
+        return cards
+
+    for filename in os.listdir(fixture_dir):
+        if filename.startswith(("_", ".")):
+            continue
+        path = os.path.join(fixture_dir, filename)
+        if filename.endswith(".json"):
+            with open(path, "r", encoding="utf-8") as f:
+                card = json.load(f)
+        elif filename.endswith(RECORD_EXT):
+            card = read_card_file(path).to_dict()
+        else:
+            continue
+
+        name = card.get("name")
+        if not name:
+            continue
+        cards[name.lower()] = card
+        for face in name.split(" // "):
+            cards.setdefault(face.lower(), card)
+
+    return cards
+
+
+def placeholder_card(name):
+    """
+    Minimal card used with --synthesize so any decklist resolves offline.
+    The oracle_id is a stable digest, the same in every process and run.
+    """
+    digest = hashlib.blake2b(name.lower().encode("utf-8"), digest_size=8).hexdigest()
+    return {
+        "object": "card",
+        "name": name,
+        "oracle_id": f"stub-{digest}",
+        "type_line": "Creature",
+        "mana_cost": "{1}",
+        "cmc": 1.0,
+        "oracle_text": "",
+        "color_identity": [],
+        "produced_mana": [],
+    }
+
+
+class StubConfig:
+    def __init__(self, cards, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0,
+                 synthesize=False, seed=None):
+        self.cards = cards
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.synthesize = synthesize
+        self.by_oracle_id = {
+            card["oracle_id"]: card for card in cards.values() if card.get("oracle_id")
+        }
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def lookup(self, name):
+        card = self.cards.get(name.strip().lower())
+        if card is None and self.synthesize:
+            card = placeholder_card(name.strip())
+        return card
+
+    def lookup_identifier(self, ident):
+        # The revalidator refreshes cached cards by oracle_id
+        if "oracle_id" in ident:
+            return self.by_oracle_id.get(ident["oracle_id"])
+        return self.lookup(ident.get("name", ""))
+
+    def delay(self):
+        with self.lock:
+            jitter = self.rng.uniform(-self.jitter_ms, self.jitter_ms)
+        wait = max(0.0, self.latency_ms + jitter) / 1000
+        if wait:
+            time.sleep(wait)
+
+    def should_fail(self):
+        with self.lock:
+            self.requests += 1
+            fail = self.rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+            return fail
+
+
+# ==================================================
+# HTTP handler
+# ==================================================
+
+def _error(status, details):
+    return status, {
+        "object": "error",
+        "code": "not_found" if status == 404 else "stub_error",
+        "status": status,
+        "details": details,
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    config = None  # set by make_server
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self, route):
+        self.config.delay()
+        if self.config.should_fail():
+            self._send(*_error(503, "Injected failure"))
+            return
+        self._send(*route())
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/cards/named":
+            self._send(*_error(404, "Unknown endpoint"))
+            return
+        self._handle(lambda: self._named(parse_qs(url.query)))
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/cards/collection":
+            self._send(*_error(404, "Unknown endpoint"))
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send(*_error(400, "Invalid JSON"))
+            return
+        self._handle(lambda: self._collection(body))
+
+    def _named(self, query):
+        name = (query.get("exact") or query.get("fuzzy") or [""])[0]
+        card = self.config.lookup(name)
+        if card is None:
+            return _error(404, f"No card found named {name!r}")
+        return 200, card
+
+    def _collection(self, body):
+        identifiers = body.get("identifiers", [])
+        if len(identifiers) > MAX_BATCH:
+            return _error(422, f"Too many identifiers (max {MAX_BATCH})")
+
+        data = []
+        not_found = []
+        for ident in identifiers:
+            card = self.config.lookup_identifier(ident)
+            if card is None:
+                not_found.append(ident)
+            else:
+                data.append(card)
+
+        return 200, {"object": "list", "not_found": not_found, "data": data}
+
+
+def make_server(config, host="127.0.0.1", port=0):
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"config": config})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve_in_thread(config, host="127.0.0.1", port=0):
+    """
+    Starts the stub on a daemon thread. Returns (server, base_url).
+    """
+    server = make_server(config, host, port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Scryfall stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", default="cache/scryfall",
+                        help="directory of card JSON files")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of requests answered with a 503")
+    parser.add_argument("--synthesize", action="store_true",
+                        help="invent placeholder cards for unknown names")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        load_fixtures(args.fixtures),
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        synthesize=args.synthesize,
+        seed=args.seed,
+    )
+    server = make_server(config, args.host, args.port)
+    print(f"Scryfall stub on http://{args.host}:{args.port} "
+          f"({len(config.cards)} fixture names)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
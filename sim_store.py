@@ -0,0 +1,234 @@
+import os
+import random
+import hashlib
+from collections import Counter
+
+import analysis
+import simulations
+from capabilities import CAPABILITY_VERSION
+from deck_table import COLORS
+from cache_io import read_json, update_json
+from scryfall import card_data_generation
+
+STORE_DIR = "cache/simulations"
+
+# Bump when simulator logic changes; old results are then ignored.
+# v2: hands are drawn with rng.sample instead of a full shuffle
+SIMULATOR_VERSION = 2
+
+# Iterations run in fixed, independently seeded blocks so a stored result
+# with N blocks can be extended to M blocks without redoing the first N.
+BLOCK_SIZE = 1000
+
+
+# ==================================================
+# Deck hashing
+# ==================================================
+
+def cards_hash(commander_name, card_names):
+    """
+    Canonical hash of a commander + quantity-weighted card names,
+    independent of list order and spelling case.
+    """
+    counts = Counter(name.lower() for name in card_names)
+
+    h = hashlib.sha256()
+    h.update(commander_name.lower().encode("utf-8"))
+    for name, qty in sorted(counts.items()):
+        h.update(f"\n{qty} {name}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def deck_hash(deck):
+    return cards_hash(deck.commander.get("name", ""), deck.cards)
+
+
+def is_complete(deck):
+    """
+    False if some cards are missing only because a fetch failed: results
+    for such a deck must not be stored under the healthy deck's hash.
+    """
+    return not any(u.reason == "request_failed" for u in getattr(deck, "unresolved", []))
+
+
+# ==================================================
+# Simulators
+# ==================================================
+
+def _colors(deck):
+    # Every commander's colors, or the deck's own without one (see Deck)
+    return [c for c in COLORS if c in deck.commander_colors]
+
+
+def _deck_mulligans(deck, iterations, rng):
+    return simulations.mulligan_counts(
+        cards=deck.cards,
+        card_capabilities=deck.card_capabilities,
+        color_identity=_colors(deck),
+        simulations=iterations,
+        rng=rng
+    )
+
+
+def _deck_london_mulligans(deck, iterations, rng):
+    return simulations.mulligan_counts(
+        cards=deck.cards,
+        card_capabilities=deck.card_capabilities,
+        color_identity=_colors(deck),
+        simulations=iterations,
+        rng=rng,
+        london=True
+    )
+
+
+def _deck_stratified_mulligans(antithetic):
+    def counts(deck, iterations, rng):
+        return simulations.stratified_mulligan_counts(
+            cards=deck.cards,
+            card_capabilities=deck.card_capabilities,
+            color_identity=_colors(deck),
+            simulations=iterations,
+            rng=rng,
+            antithetic=antithetic
+        )
+    return counts
+
+
+def _stratified_mulligans(antithetic):
+    def counts(deck, iterations, rng):
+        return analysis.stratified_mulligan_counts(deck, iterations, rng, antithetic=antithetic)
+    return counts
+
+
+# kind -> (counts(deck, iterations, rng), summarize(counts))
+SIMULATORS = {
+    "hand_quality": (_deck_mulligans, simulations.summarize_mulligans),
+    "hand_quality_london": (_deck_london_mulligans, simulations.summarize_mulligans),
+    "mulligans": (analysis.mulligan_counts, analysis.summarize_mulligans),
+    "early_game": (analysis.early_game_counts, analysis.summarize_early_game),
+
+    # Variance-reduced variants: same fields plus "stderr"
+    "hand_quality_stratified": (
+        _deck_stratified_mulligans(False), simulations.summarize_stratified_mulligans),
+    "hand_quality_antithetic": (
+        _deck_stratified_mulligans(True), simulations.summarize_stratified_mulligans),
+    "mulligans_stratified": (
+        _stratified_mulligans(False), analysis.summarize_stratified_mulligans),
+    "mulligans_antithetic": (
+        _stratified_mulligans(True), analysis.summarize_stratified_mulligans),
+}
+
+
+def merge_counts(a, b):
+    """
+    Sums two count dicts (nested dicts are merged recursively).
+    """
+    merged = dict(a)
+    for key, value in b.items():
+        if key not in merged:
+            merged[key] = value
+        elif isinstance(value, dict):
+            merged[key] = merge_counts(merged[key], value)
+        else:
+            merged[key] = merged[key] + value
+    return merged
+
+
+def block_rng(seed, kind, block):
+    return random.Random(f"{seed}:{kind}:{block}")
+
+
+# ==================================================
+# Store
+# ==================================================
+
+class SimulationStore:
+    """
+    Seeded simulation results keyed by (deck hash, simulator version, seed).
+
+    Results are stored as raw counts with the number of blocks run, so a
+    request for more iterations only simulates the missing blocks and
+    merges them into the stored counts.
+    """
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self._memory = {}
+
+    def _path(self, digest):
+        return os.path.join(self.root, f"{digest}.json")
+
+    def _load(self, digest):
+        if digest in self._memory:
+            return self._memory[digest]
+
+        entries = read_json(self._path(digest), {})
+        self._memory[digest] = entries
+        return entries
+
+    def _save(self, digest, key):
+        """
+        Locked merge: another worker may have extended the same result,
+        so the entry with more blocks wins.
+        """
+        ours = self._memory[digest][key]
+
+        def merge(on_disk):
+            theirs = on_disk.get(key)
+            if not theirs or theirs["blocks"] < ours["blocks"]:
+                on_disk[key] = ours
+            return on_disk
+
+        self._memory[digest] = update_json(self._path(digest), merge)
+
+    @staticmethod
+    def key(kind, seed):
+        # Simulators read capabilities and card data, so their versions are
+        # part of the key (as they are of the API ETags)
+        return f"{kind}:v{SIMULATOR_VERSION}.{CAPABILITY_VERSION}.g{card_data_generation()}:{seed}"
+
+    def get(self, digest, kind, seed=0):
+        return self._load(digest).get(self.key(kind, seed))
+
+    def run(self, deck, kind, iterations, seed=0):
+        """
+        Returns the summarized result for at least `iterations` iterations
+        (rounded up to whole blocks). Stored blocks are reused; only the
+        missing blocks are simulated. Results for an incomplete deck (see
+        is_complete) are computed but never stored.
+        """
+        counts_fn, summarize = SIMULATORS[kind]
+
+        digest = deck_hash(deck)
+        entries = self._load(digest)
+        key = self.key(kind, seed)
+
+        stored = entries.get(key, {"blocks": 0, "counts": None})
+        wanted = max(1, -(-iterations // BLOCK_SIZE))
+
+        if stored["blocks"] < wanted:
+            counts = stored["counts"]
+            for block in range(stored["blocks"], wanted):
+                block_counts = counts_fn(deck, BLOCK_SIZE, block_rng(seed, kind, block))
+                counts = block_counts if counts is None else merge_counts(counts, block_counts)
+
+            stored = {"blocks": wanted, "counts": counts}
+            if is_complete(deck):
+                entries[key] = stored
+                self._save(digest, key)
+
+        result = summarize(stored["counts"])
+        result["iterations"] = stored["blocks"] * BLOCK_SIZE
+        result["seed"] = seed
+        result["deck_hash"] = digest
+        return result
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = SimulationStore()
+    return _store
@@ -1,17 +1,34 @@
 import random
 
+from hand_table import HandTable, card_code, color_mask, hand_signature
+from stratified import delta_stderr, estimate, sample_strata
 
-def simulate_mulligans(
+QUALITIES = ("excellent", "keepable", "bad")
+QUALITY_RANK = {"bad": 0, "keepable": 1, "excellent": 2}
+
+
+def mulligan_counts(
     cards,
     card_capabilities,
     color_identity,
     simulations=5000,
-    max_mulligans=3
+    max_mulligans=3,
+    rng=None,
+    london=False
 ):
-    results = {
+    """
+    Raw hand-quality tallies. Counts from separate runs can be summed.
+
+    By default a mulligan draws a smaller hand; with london=True it draws
+    7 and bottoms one card per mulligan, keeping the best subset.
+    """
+    rng = rng or random.Random()
+    table = quality_table(cards, card_capabilities, color_identity)
+
+    counts = {
         "simulations": simulations,
         "kept_hands": 0,
-        "average_mulligans": 0,
+        "total_mulligans": 0,
         "hand_quality": {
             "excellent": 0,
             "keepable": 0,
@@ -19,36 +36,44 @@ def simulate_mulligans(
         }
     }
 
-    mulligan_counts = []
-
-    deck = cards.copy()
+    # Only the drawn cards matter, so draw them instead of shuffling
+    deck = table.hand_codes(cards)
+    draw = min(7, len(deck))
 
     for _ in range(simulations):
         mulligans = 0
 
         while True:
-            random.shuffle(deck)
-            hand_size = 7 - mulligans
-            hand = deck[:hand_size]
-
-            quality = evaluate_hand(hand, card_capabilities, color_identity)
+            if london and mulligans:
+                quality = table.best_after_bottom(rng.sample(deck, draw), min(mulligans, draw))
+            else:
+                quality = table.outcome(hand_signature(rng.sample(deck, max(draw - mulligans, 0))))
 
             if quality != "bad" or mulligans >= max_mulligans:
-                results["hand_quality"][quality] += 1
-                mulligan_counts.append(mulligans)
-                results["kept_hands"] += 1
+                counts["hand_quality"][quality] += 1
+                counts["total_mulligans"] += mulligans
+                counts["kept_hands"] += 1
                 break
 
             mulligans += 1
 
-    results["average_mulligans"] = round(
-        sum(mulligan_counts) / len(mulligan_counts), 2
-    )
+    return counts
 
-    for k in results["hand_quality"]:
-        results["hand_quality"][k] = round(
-            results["hand_quality"][k] / simulations, 2
-        )
+
+def summarize_mulligans(counts):
+    simulations = counts["simulations"]
+
+    results = {
+        "simulations": simulations,
+        "kept_hands": counts["kept_hands"],
+        "average_mulligans": round(
+            counts["total_mulligans"] / counts["kept_hands"], 2
+        ),
+        "hand_quality": {
+            k: round(v / simulations, 2)
+            for k, v in counts["hand_quality"].items()
+        }
+    }
 
     results["keep_rate"] = round(
         1 - results["hand_quality"]["bad"], 2
@@ -57,7 +82,147 @@ def simulate_mulligans(
     return results
 
 
-def evaluate_hand(hand, card_capabilities, color_identity):
+def simulate_mulligans(
+    cards,
+    card_capabilities,
+    color_identity,
+    simulations=5000,
+    max_mulligans=3,
+    rng=None
+):
+    return summarize_mulligans(
+        mulligan_counts(
+            cards,
+            card_capabilities,
+            color_identity,
+            simulations=simulations,
+            max_mulligans=max_mulligans,
+            rng=rng
+        )
+    )
+
+
+# ==================================================
+# Stratified sampling
+# ==================================================
+
+def _hand_sizes(max_mulligans):
+    return [max(7 - m, 0) for m in range(max_mulligans + 1)]
+
+
+def stratified_mulligan_counts(
+    cards,
+    card_capabilities,
+    color_identity,
+    simulations=5000,
+    max_mulligans=3,
+    rng=None,
+    antithetic=False
+):
+    """
+    Hand-quality tallies per hand size, stratified by land count
+    (see stratified.py). Hands with fewer than 2 lands are always "bad",
+    so they are not sampled.
+
+    Every mulligan is a fresh shuffle, so the kept-hand distribution is
+    an exact function of the per-size quality probabilities. Samples are
+    split across the sizes in halves (7 cards: 1/2, 6 cards: 1/4, ...)
+    because each extra mulligan is reached less often.
+    """
+    rng = rng or random.Random()
+    evaluate = quality_table(cards, card_capabilities, color_identity).evaluate
+
+    lands, spells = [], []
+    for name in cards:
+        if "land" in card_capabilities.get(name, {}).get("types", []):
+            lands.append(name)
+        else:
+            spells.append(name)
+
+    sizes = _hand_sizes(max_mulligans)
+    shares = [2 ** -(i + 1) for i in range(len(sizes))]
+    shares[-1] *= 2
+
+    return {
+        "simulations": simulations,
+        "sizes": {
+            str(size): sample_strata(
+                lands, spells, size,
+                evaluate=evaluate,
+                labels=QUALITIES,
+                iterations=int(simulations * share),
+                rng=rng,
+                fixed=lambda land_count: "bad" if land_count < 2 else None,
+                antithetic=antithetic
+            )
+            for size, share in zip(sizes, shares)
+        }
+    }
+
+
+def _kept_hand_outcomes(quality_by_size, max_mulligans):
+    """
+    quality_by_size: { hand_size: {quality: probability} }
+    """
+    sizes = _hand_sizes(max_mulligans)
+    hand_quality = dict.fromkeys(QUALITIES, 0.0)
+    average_mulligans = 0.0
+    reach = 1.0   # probability of getting to this mulligan
+
+    for mulligans, size in enumerate(sizes):
+        quality = quality_by_size[size]
+        last = mulligans == max_mulligans
+
+        for q in QUALITIES:
+            if q != "bad" or last:
+                hand_quality[q] += reach * quality[q]
+
+        stops = reach if last else reach * (1 - quality["bad"])
+        average_mulligans += mulligans * stops
+        reach *= quality["bad"]
+
+    return {"average_mulligans": average_mulligans, **hand_quality}
+
+
+def summarize_stratified_mulligans(counts):
+    # One entry per hand size (counts merge by summing, so no scalars here)
+    max_mulligans = len(counts["sizes"]) - 1
+
+    params = {}
+    cov = {}
+    for size, strata in counts["sizes"].items():
+        p, c = estimate(strata, QUALITIES)
+        for q in QUALITIES:
+            params[(int(size), q)] = p[q]
+            for q2 in QUALITIES:
+                cov[((int(size), q), (int(size), q2))] = c[(q, q2)]
+
+    def fn(params):
+        by_size = {}
+        for (size, q), value in params.items():
+            by_size.setdefault(size, {})[q] = value
+        return _kept_hand_outcomes(by_size, max_mulligans)
+
+    outcomes = fn(params)
+    stderr = delta_stderr(fn, params, cov)
+
+    simulations = counts["simulations"]
+    results = {
+        "simulations": simulations,
+        "kept_hands": simulations,
+        "average_mulligans": round(outcomes["average_mulligans"], 2),
+        "hand_quality": {q: round(outcomes[q], 2) for q in QUALITIES},
+    }
+    results["keep_rate"] = round(1 - results["hand_quality"]["bad"], 2)
+    results["stderr"] = {
+        "average_mulligans": round(stderr["average_mulligans"], 4),
+        "hand_quality": {q: round(stderr[q], 4) for q in QUALITIES},
+        "keep_rate": round(stderr["bad"], 4),
+    }
+    return results
+
+
+def _hand_features(hand, card_capabilities):
     lands = 0
     ramp = 0
     colors_available = set()
@@ -74,12 +239,37 @@ def evaluate_hand(hand, card_capabilities, color_identity):
                 for color in source.get("produces", []):
                     colors_available.add(color)
 
-    missing_colors = set(color_identity) - colors_available
+    return lands, ramp, colors_available
+
 
+def _quality(lands, has_ramp, colors, required):
     if lands < 2:
         return "bad"
 
-    if lands >= 2 and ramp >= 1 and not missing_colors:
+    if has_ramp and not required & ~colors:
         return "excellent"
 
     return "keepable"
+
+
+def evaluate_hand(hand, card_capabilities, color_identity):
+    lands, ramp, colors_available = _hand_features(hand, card_capabilities)
+    return _quality(lands, ramp >= 1, color_mask(colors_available), color_mask(color_identity))
+
+
+def quality_table(cards, card_capabilities, color_identity):
+    """
+    evaluate_hand as a signature table (see hand_table.py).
+    """
+    required = color_mask(color_identity)
+    codes = {}
+
+    for name in set(cards):
+        lands, ramp, colors = _hand_features([name], card_capabilities)
+        codes[name] = card_code(lands, ramp, color_mask(colors))
+
+    return HandTable(
+        codes,
+        lambda lands, has_ramp, colors: _quality(lands, has_ramp, colors, required),
+        rank=lambda quality, lands: (QUALITY_RANK[quality], -abs(lands - 3))
+    )
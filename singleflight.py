@@ -0,0 +1,46 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    In-process request coalescing: at most one fetch per key is in flight.
+
+    A caller claims the keys it needs. Keys nobody is fetching are handed
+    back as `owned` (the caller must release them with an outcome); keys
+    already in flight come back as futures to wait on.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def claim(self, items, key=lambda item: item):
+        owned = []
+        waiting = {}
+
+        with self._lock:
+            for item in items:
+                k = key(item)
+                future = self._calls.get(k)
+                if future is None:
+                    self._calls[k] = Future()
+                    owned.append(item)
+                else:
+                    waiting[item] = future
+
+        return owned, waiting
+
+    def release(self, items, outcome, key=lambda item: item):
+        """
+        Publishes outcome(item) to everyone waiting on each owned item.
+        """
+        with self._lock:
+            futures = [(item, self._calls.pop(key(item))) for item in items]
+
+        for item, future in futures:
+            future.set_result(outcome(item))
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,178 @@
+"""
+Variance-reduced sampling for the opening-hand simulators.
+
+Opening hands are stratified by land count. Each stratum's weight is its
+exact hypergeometric probability, hands are only sampled inside a
+stratum, and strata whose outcome the land count already decides
+(e.g. zero lands) are not sampled at all. With `antithetic=True` every
+shuffle yields two hands, one from each end of the shuffled lands and
+spells.
+
+Counts are nested dicts of ints, so results from separate blocks merge
+with sim_store.merge_counts like the plain Monte Carlo counts do. Even
+the stratum weights are stored as integer hand counts: every block adds
+the same numerators, so normalizing the merged sums still gives the
+exact weights.
+"""
+
+from math import comb, sqrt
+
+# Every live stratum gets at least this many sampling units per block,
+# so its variance can be estimated
+MIN_UNITS = 2
+
+
+# ==================================================
+# Sampling
+# ==================================================
+
+def land_strata(n_lands, n_spells, hand_size):
+    """
+    { land_count: number of distinct hands with that many lands }
+    """
+    return {
+        lands: comb(n_lands, lands) * comb(n_spells, hand_size - lands)
+        for lands in range(0, hand_size + 1)
+        if lands <= n_lands and hand_size - lands <= n_spells
+    }
+
+
+def _allocate(hands, live, budget):
+    """
+    Splits `budget` units over the live strata in proportion to weight.
+    """
+    total = sum(hands[l] for l in live)
+    return {
+        l: max(MIN_UNITS, round(budget * hands[l] / total))
+        for l in live
+    }
+
+
+def sample_strata(lands, spells, hand_size, evaluate, labels, iterations, rng,
+                  fixed=None, antithetic=False):
+    """
+    Stratified tallies of evaluate(hand) -> label for hands of hand_size.
+
+    fixed(land_count) may return the label a stratum is known to have;
+    those strata cost no samples. `iterations` is the number of hands to
+    evaluate (each antithetic unit evaluates two).
+    """
+    fixed = fixed or (lambda land_count: None)
+    hands = land_strata(len(lands), len(spells), hand_size)
+
+    strata = {}
+    live = []
+    for land_count, n_hands in hands.items():
+        label = fixed(land_count)
+        if label is not None:
+            strata[str(land_count)] = {"hands": n_hands, "fixed": {label: 1}}
+        else:
+            live.append(land_count)
+
+    per_unit = 2 if antithetic else 1
+    units = _allocate(hands, live, iterations // per_unit) if live else {}
+
+    lands = list(lands)
+    spells = list(spells)
+
+    for land_count in live:
+        n_spells = hand_size - land_count
+        sums = dict.fromkeys(labels, 0)
+        prods = {f"{a}*{b}": 0 for i, a in enumerate(labels) for b in labels[i:]}
+
+        for _ in range(units[land_count]):
+            if antithetic:
+                rng.shuffle(lands)
+                rng.shuffle(spells)
+                pair = (
+                    lands[:land_count] + spells[:n_spells],
+                    lands[len(lands) - land_count:] + spells[len(spells) - n_spells:],
+                )
+            else:
+                pair = (rng.sample(lands, land_count) + rng.sample(spells, n_spells),)
+
+            unit = dict.fromkeys(labels, 0)
+            for hand in pair:
+                unit[evaluate(hand)] += 1
+
+            for i, a in enumerate(labels):
+                sums[a] += unit[a]
+                for b in labels[i:]:
+                    prods[f"{a}*{b}"] += unit[a] * unit[b]
+
+        strata[str(land_count)] = {
+            "hands": hands[land_count],
+            "units": units[land_count],
+            "sampled": units[land_count] * per_unit,
+            "sum": sums,
+            "prod": prods,
+        }
+
+    return strata
+
+
+# ==================================================
+# Estimation
+# ==================================================
+
+def estimate(strata, labels):
+    """
+    Stratified estimate of P(label) and its covariance matrix.
+    Returns ({label: p}, {(a, b): cov}).
+    """
+    total = sum(s["hands"] for s in strata.values())
+    p = dict.fromkeys(labels, 0.0)
+    cov = {(a, b): 0.0 for a in labels for b in labels}
+
+    for s in strata.values():
+        w = s["hands"] / total
+
+        if "fixed" in s:
+            p[next(iter(s["fixed"]))] += w
+            continue
+
+        units = s["units"]
+        per_unit = s["sampled"] / units
+        means = {a: s["sum"][a] / s["sampled"] for a in labels}
+        for a in labels:
+            p[a] += w * means[a]
+
+        if units < 2:
+            continue
+        for i, a in enumerate(labels):
+            for b in labels[i:]:
+                # Covariance of per-unit means, then of the stratum mean
+                c = (s["prod"][f"{a}*{b}"] / per_unit ** 2 - units * means[a] * means[b])
+                c = w * w * c / (units - 1) / units
+                cov[(a, b)] += c
+                if a != b:
+                    cov[(b, a)] += c
+
+    return p, cov
+
+
+def delta_stderr(fn, params, cov, eps=1e-6):
+    """
+    Standard errors of fn(params) -> {field: value} by the delta method.
+
+    params: {key: value}; cov: {(key, key): covariance}. Keys whose
+    covariance is missing are treated as independent.
+    """
+    base = fn(params)
+    grads = {}
+    for key in params:
+        shifted = dict(params)
+        shifted[key] += eps
+        out = fn(shifted)
+        grads[key] = {f: (out[f] - base[f]) / eps for f in base}
+
+    stderr = {}
+    for field in base:
+        var = 0.0
+        for a in params:
+            for b in params:
+                c = cov.get((a, b), 0.0)
+                if c:
+                    var += grads[a][field] * grads[b][field] * c
+        stderr[field] = sqrt(max(var, 0.0))
+    return stderr
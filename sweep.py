@@ -0,0 +1,176 @@
+import random
+from bisect import bisect_left
+
+MAX_MULLIGANS = 3
+HAND_SIZE = 7
+
+# Screw: fewer than 3 lands among the kept hand + 3 draws (missed T3 drop)
+SCREW_CARDS = 10
+SCREW_LANDS = 3
+
+# Flood: 7+ lands among the kept hand + 5 draws
+FLOOD_CARDS = 12
+FLOOD_LANDS = 7
+
+
+# ==================================================
+# Deck classification
+# ==================================================
+
+def _base_counts(deck):
+    """
+    Returns (deck_size, lands, ramp) for the current list, using the
+    same land / ramp definitions as Deck.analyze.
+    """
+    lands = ramp = 0
+
+    for name in deck.cards:
+        caps = deck.card_capabilities.get(name, {})
+        if "land" in caps.get("types", []):
+            lands += 1
+        elif caps.get("mana"):
+            ramp += 1
+
+    return len(deck.cards), lands, ramp
+
+
+def _default_range(base, spread, upper):
+    return [n for n in range(base - spread, base + spread + 1) if 0 <= n <= upper]
+
+
+# ==================================================
+# Land / ramp sweep
+# ==================================================
+
+def sweep_land_ramp(
+    deck,
+    land_counts=None,
+    ramp_counts=None,
+    iterations=10_000,
+    seed=None
+):
+    """
+    Evaluates keep rate, early land drops and screw/flood risk for every
+    (lands, ramp) variant of the deck in a single simulation pass.
+
+    Every variant is scored against the SAME random draws (common random
+    numbers). A deck is modelled as slots 0..N-1: for variant (L, R),
+    slots < L are lands, slots < L + R are ramp and the rest are spells.
+    Each draw is a list of slot ids, so a sorted opening hand answers
+    "how many lands / any ramp?" for every variant with two bisects.
+
+    Color requirements are not modelled: added or cut lands have no
+    defined color, so keep decisions only look at land count and ramp.
+    """
+
+    deck_size, base_lands, base_ramp = _base_counts(deck)
+
+    if land_counts is None:
+        land_counts = _default_range(base_lands, 3, deck_size)
+    if ramp_counts is None:
+        ramp_counts = _default_range(base_ramp, 2, deck_size)
+
+    variants = [
+        (lands, ramp)
+        for lands in sorted(set(land_counts))
+        for ramp in sorted(set(ramp_counts))
+        if lands + ramp <= deck_size
+    ]
+
+    rng = random.Random(seed)
+    depth = min(FLOOD_CARDS, deck_size)
+    slots = range(deck_size)
+
+    # Per variant: [keep_7, mulls, t1, t2, t3, screw, flood]
+    totals = [[0] * 7 for _ in variants]
+
+    for _ in range(iterations):
+        # Draws for this iteration, shared by every variant.
+        # Each attempt is (draw order, sorted opening hand).
+        attempts = []
+
+        for v, (lands, ramp) in enumerate(variants):
+            ramp_end = lands + ramp
+            mulls = 0
+
+            while True:
+                if mulls == len(attempts):
+                    draw = rng.sample(slots, depth)
+                    attempts.append((draw, sorted(draw[:HAND_SIZE])))
+
+                draw, hand = attempts[mulls]
+                hand_lands = bisect_left(hand, lands)
+                has_ramp = bisect_left(hand, ramp_end) > hand_lands
+
+                keepable = (
+                    0 < hand_lands < 6
+                    and (hand_lands > 1 or has_ramp)
+                )
+                if keepable or mulls == MAX_MULLIGANS:
+                    break
+                mulls += 1
+
+            stats = totals[v]
+            stats[1] += mulls
+            if mulls == 0:
+                stats[0] += 1
+
+            # ---------- EARLY GAME (one land drop per turn) ----------
+            seen = hand_lands
+            played = 0
+            screw_seen = None
+
+            for i in range(HAND_SIZE, depth):
+                if i == SCREW_CARDS:
+                    screw_seen = seen
+                if draw[i] < lands:
+                    seen += 1
+
+                turn = i - HAND_SIZE + 1
+                if turn <= 3:
+                    if seen > played:
+                        played += 1
+                    if played >= turn:
+                        stats[1 + turn] += 1
+
+            if screw_seen is None:
+                screw_seen = seen
+            if screw_seen < SCREW_LANDS:
+                stats[5] += 1
+            if seen >= FLOOD_LANDS:
+                stats[6] += 1
+
+    results = []
+    for (lands, ramp), stats in zip(variants, totals):
+        keep_7, mulls, t1, t2, t3, screw, flood = stats
+        results.append({
+            "lands": lands,
+            "ramp": ramp,
+            "keep_7_pct": keep_7 / iterations * 100,
+            "avg_mulls": mulls / iterations,
+            "t1_land_pct": t1 / iterations * 100,
+            "t2_land_pct": t2 / iterations * 100,
+            "t3_land_pct": t3 / iterations * 100,
+            "screw_pct": screw / iterations * 100,
+            "flood_pct": flood / iterations * 100,
+        })
+
+    baseline = next(
+        (r for r in results if r["lands"] == base_lands and r["ramp"] == base_ramp),
+        None
+    )
+    if baseline:
+        for r in results:
+            r["delta_keep_7_pct"] = r["keep_7_pct"] - baseline["keep_7_pct"]
+            r["delta_screw_pct"] = r["screw_pct"] - baseline["screw_pct"]
+            r["delta_flood_pct"] = r["flood_pct"] - baseline["flood_pct"]
+
+    return {
+        "iterations": iterations,
+        "seed": seed,
+        "deck_size": deck_size,
+        "baseline": {"lands": base_lands, "ramp": base_ramp},
+        "land_counts": sorted({v[0] for v in variants}),
+        "ramp_counts": sorted({v[1] for v in variants}),
+        "variants": results,
+    }
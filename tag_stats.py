@@ -1,20 +1,25 @@
-def summarize_functions(deck):
-    summary = {
-        "ramp": 0,
-        "draw": 0,
-        "removal": 0
-    }
+from card_index import get_card_index
 
-    for card in deck.cards:
-        caps = deck.capabilities.get(card.name, {})
+# summary label -> card index key (only keys card_keys actually emits;
+# nothing extracts removal yet)
+FUNCTION_KEYS = {
+    "ramp": "cap:ramp",
+    "draw": "cap:draw",
+}
 
-        if caps.get("mana"):
-            summary["ramp"] += card.count
 
-        if caps.get("draw"):
-            summary["draw"] += card.count
+def summarize_functions(deck):
+    """
+    Quantity-weighted number of cards per function, read from the card
+    index so decks and corpus searches share one definition.
+    """
+    index = get_card_index()
+    index.add_deck(deck)
 
-        if caps.get("removal"):
-            summary["removal"] += card.count
+    names = []
+    for name in deck.cards:
+        card = deck.card_data.get(name.lower())
+        if card:
+            names.append(card.get("name", name))
 
-    return summary
+    return index.deck_counts(names, FUNCTION_KEYS)
@@ -1,12 +1,35 @@
 from flask import Flask, render_template, request
-from deck import Deck
-from deck_parser import parse_deck
-from scryfall import fetch_cards_bulk
-from capabilities import extract_capabilities
+from access_stats import WARM_ON_START, WARM_SIMULATE, warm_in_background
+from pipeline import load_deck
+from card_store import open_shared
+from commander_index import suggest_commanders
+from api import api
 from deck_profile import DeckProfile
-from mulligans import run_mulligan_simulation
+from mulligans import MAX_ITERATIONS, SAMPLING_MODES, run_mulligan_simulation
+from sweep import sweep_land_ramp
+from optimizer import suggest_swaps
+from profiling import admin, profiled, stage
+from revalidate import ENABLED as REVALIDATE, ensure_revalidator
 
 app = Flask(__name__)
+app.register_blueprint(api)
+app.register_blueprint(admin)
+
+# Map the shared card/capability tables now so `gunicorn --preload`
+# workers inherit one mapping instead of building their own copies
+open_shared()
+
+# Preload what traffic asks for most (python access_stats.py warm does
+# the same from cron or a deploy hook)
+if WARM_ON_START:
+    warm_in_background(simulate=WARM_SIMULATE)
+
+
+@app.before_request
+def _start_revalidator():
+    # Started lazily so forked workers each get a live thread
+    if REVALIDATE:
+        ensure_revalidator()
 
 
 @app.route("/")
@@ -14,64 +37,61 @@ def index():
     return render_template("index.html", analysis=None, profile=None)
 
 
-@app.route("/analyze", methods=["POST"])
-def analyze():
+def _deck_from_request():
+    """
+    Returns (deck, deck_id, decklist) for the posted form, reusing the
+    deck behind its deck_id handle when possible.
+    """
     decklist = request.form.get("decklist", "")
+    with stage("load_deck"):
+        deck, deck_id = load_deck(decklist, request.form.get("deck_id", ""))
+    return deck, deck_id, decklist
 
-    flat_cards, unique_cards, commander_name = parse_deck(decklist)
-
-    card_data_map = fetch_cards_bulk(unique_cards)
-
-    commander_card = card_data_map.get(commander_name.lower())
-    if not commander_card:
-        raise RuntimeError(f"Commander not found: {commander_name}")
 
-    card_capabilities = {}
-    for name in unique_cards:
-        card_data = card_data_map.get(name.lower())
-        if card_data:
-            card_capabilities[name] = extract_capabilities(card_data)
-
-    deck = Deck(flat_cards, commander_card)
-    deck.card_capabilities = card_capabilities
-    deck.card_data = card_data_map
+@app.route("/analyze", methods=["POST"])
+@profiled("analyze")
+def analyze():
+    deck, deck_id, decklist = _deck_from_request()
 
-    analysis = deck.analyze()
-    profile = DeckProfile(deck, analysis).build()
+    with stage("analyze"):
+        analysis = deck.analyze()
+    with stage("profile"):
+        profile = DeckProfile(deck, analysis).build()
+    with stage("suggestions"):
+        suggestions = suggest_commanders(deck)
 
     return render_template(
         "index.html",
         analysis=analysis,
         profile=profile,
-        decklist=decklist
+        decklist=decklist,
+        deck_id=deck_id,
+        unresolved=deck.unresolved,
+        suggestions=suggestions
     )
 
 
 @app.route("/mulligans", methods=["POST"])
+@profiled("mulligans")
 def mulligans():
-    decklist = request.form.get("decklist", "")
+    iterations = max(1, min(
+        request.form.get("iterations", 10_000, type=int),
+        MAX_ITERATIONS
+    ))
+    seed = request.form.get("seed", 0, type=int)
+    sampling = request.form.get("sampling", "monte_carlo")
+    if sampling not in SAMPLING_MODES:
+        sampling = "monte_carlo"
 
-    flat_cards, unique_cards, commander_name = parse_deck(decklist)
-    card_data_map = fetch_cards_bulk(unique_cards)
-
-    commander_card = card_data_map.get(commander_name.lower())
-    if not commander_card:
-        raise RuntimeError(f"Commander not found: {commander_name}")
-
-    card_capabilities = {}
-    for name in unique_cards:
-        card_data = card_data_map.get(name.lower())
-        if card_data:
-            card_capabilities[name] = extract_capabilities(card_data)
-
-    deck = Deck(flat_cards, commander_card)
-    deck.commander_colors = set(commander_card.get("color_identity", []))
-    deck.card_capabilities = card_capabilities
-    deck.card_data = card_data_map
+    deck, deck_id, decklist = _deck_from_request()
 
     # 🔥 ONLY NOW do we run simulations
-    results = run_mulligan_simulation(deck)
+    with stage("simulate"):
+        results = run_mulligan_simulation(
+            deck, iterations=iterations, seed=seed, sampling=sampling
+        )
     results["decklist"] = decklist
+    results["deck_id"] = deck_id
     
     return render_template(
         "mulligans.html",
@@ -79,5 +99,34 @@ def mulligans():
     )
 
 
+@app.route("/sweep", methods=["POST"])
+def sweep():
+    deck, deck_id, decklist = _deck_from_request()
+
+    # One pass, shared random draws across every land/ramp variant
+    results = sweep_land_ramp(deck)
+    results["decklist"] = decklist
+    results["deck_id"] = deck_id
+
+    return render_template(
+        "sweep.html",
+        results=results
+    )
+
+
+@app.route("/optimize", methods=["POST"])
+def optimize():
+    deck, deck_id, decklist = _deck_from_request()
+
+    results = suggest_swaps(deck)
+    results["decklist"] = decklist
+    results["deck_id"] = deck_id
+
+    return render_template(
+        "optimize.html",
+        results=results
+    )
+
+
 if __name__ == "__main__":
     app.run(debug=True)